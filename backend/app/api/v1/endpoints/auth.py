@@ -3,21 +3,26 @@ Authentication Endpoints
 Login, registration, and user info endpoints with JWT and PQC support.
 """
 
-from fastapi import APIRouter, HTTPException, status
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, EmailStr
 
 from app.core.config import settings
+from app.core.debug_log import AGENT_LOG_ENABLED, log_event
 from app.core.in_memory_store import (
     create_user,
     get_user_with_password,
+    update_user_password_hash,
 )
 from app.core.security import (
     Token,
-    User,
+    UserInternal,
+    aget_password_hash,
+    averify_password,
     create_access_token,
     get_current_active_user,
-    get_password_hash,
-    verify_password,
+    password_needs_rehash,
 )
 
 router = APIRouter()
@@ -61,39 +66,44 @@ async def login(credentials: LoginRequest) -> Token:
         HTTPException: If credentials are invalid
     """
     # #region agent log
-    import json
-    try:
-        with open(r'd:\Hacakathons\Suraksh\.cursor\debug.log', 'a') as f:
-            f.write(json.dumps({"location":"auth.py:51","message":"Login endpoint called","data":{"username":credentials.username},"timestamp":int(__import__('time').time()*1000),"sessionId":"debug-session","runId":"run1","hypothesisId":"A"}) + '\n')
-    except: pass
+    if AGENT_LOG_ENABLED:
+        log_event({"location":"auth.py:51","message":"Login endpoint called","data":{"username":credentials.username},"timestamp":time.time_ns() // 1_000_000,"sessionId":"debug-session","runId":"run1","hypothesisId":"A"})
     # #endregion
-    user_data = get_user_with_password(credentials.username)
+    record = get_user_with_password(credentials.username)
     
-    if not user_data:
+    if record is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    if not verify_password(credentials.password, user_data["hashed_password"]):
+    user = record.user
+    if not await averify_password(credentials.password, record.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    if not user_data["is_active"]:
+    if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Inactive user account"
         )
     
+    # Upgrade legacy bcrypt hashes to argon2id now that we have the plain password
+    if password_needs_rehash(record.hashed_password):
+        update_user_password_hash(
+            user.username,
+            await aget_password_hash(credentials.password),
+        )
+    
     # Create JWT token
     access_token_expires = None  # Use default from settings
     token_data = {
-        "sub": user_data["username"],
-        "clearance_level": user_data["clearance_level"],
+        "sub": user.username,
+        "clearance_level": user.clearance_level,
     }
     
     access_token = create_access_token(
@@ -137,15 +147,22 @@ async def register(user_data: RegisterRequest) -> UserResponse:
         )
     
     # Hash password
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await aget_password_hash(user_data.password)
     
-    # Create user
-    user = create_user(
-        username=user_data.username,
-        email=user_data.email,
-        hashed_password=hashed_password,
-        clearance_level=user_data.clearance_level,
-    )
+    # Create user; create_user refuses a username registered by a concurrent
+    # request while this one was hashing
+    try:
+        user = create_user(
+            username=user_data.username,
+            email=user_data.email,
+            hashed_password=hashed_password,
+            clearance_level=user_data.clearance_level,
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already registered"
+        ) from None
     
     return UserResponse(
         username=user.username,
@@ -157,7 +174,7 @@ async def register(user_data: RegisterRequest) -> UserResponse:
 
 @router.get("/me", response_model=UserResponse, status_code=status.HTTP_200_OK)
 async def get_current_user_info(
-    current_user: User = get_current_active_user,
+    current_user: UserInternal = Depends(get_current_active_user),
 ) -> UserResponse:
     """
     Get current authenticated user information.
@@ -6,7 +6,8 @@ Hyper-accurate, cited answers using OpenRouter/DeepSeek API.
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 
-from app.core.security import User, get_current_active_user
+from app.core.config import settings
+from app.core.security import UserInternal, get_current_active_user
 from app.services.deepsearch.sentinel_agent import DeepSearchRAGSentinel
 
 router = APIRouter()
@@ -45,7 +46,7 @@ class DeepSearchResponse(BaseModel):
 @router.post("/", response_model=DeepSearchResponse, status_code=status.HTTP_200_OK)
 async def deepsearch_query(
     request: DeepSearchRequest,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserInternal = Depends(get_current_active_user),
 ) -> DeepSearchResponse:
     """
     Perform DeepSearch-RAG-Sentinel query using OpenRouter/DeepSeek API.
@@ -81,7 +82,7 @@ async def deepsearch_query(
         )
     
     # Initialize DeepSearch-RAG-Sentinel agent
-    agent = DeepSearchRAGSentinel()
+    agent = DeepSearchRAGSentinel(semantic_cache=settings.DEEPSEARCH_SEMANTIC_CACHE)
     
     try:
         # Perform DeepSearch query
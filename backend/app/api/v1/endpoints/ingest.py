@@ -4,22 +4,21 @@ Data ingestion into GraphRAG pipeline (Text/PDF -> Chunk -> Extract -> Neo4j/Qdr
 """
 
 import logging
+import time
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, ConfigDict, field_validator, model_validator
 
-from app.core.security import User, get_current_active_user
+from app.core.debug_log import AGENT_LOG_ENABLED, log_event
+from app.core.security import UserInternal, get_current_active_user
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 # #region agent log
-import json
-try:
-    with open(r'd:\Hacakathons\Suraksh\.cursor\debug.log', 'a') as f:
-        f.write(json.dumps({"location":"ingest.py:module_init","message":"Ingest module initialized","data":{"router_created":True},"timestamp":int(__import__('time').time()*1000),"sessionId":"debug-session","runId":"run1","hypothesisId":"B"}) + '\n')
-except: pass
+if AGENT_LOG_ENABLED:
+    log_event({"location":"ingest.py:module_init","message":"Ingest module initialized","data":{"router_created":True},"timestamp":time.time_ns() // 1_000_000,"sessionId":"debug-session","runId":"run1","hypothesisId":"B"})
 # #endregion
 
 # Lazy-load dependencies to allow router registration even if dependencies fail
@@ -165,7 +164,7 @@ class IngestResponse(BaseModel):
 @router.post("/", response_model=IngestResponse, status_code=status.HTTP_202_ACCEPTED)
 async def ingest_data(
     request: IngestRequest,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserInternal = Depends(get_current_active_user),
 ) -> IngestResponse:
     """
     Ingest text data into the GraphRAG pipeline.
@@ -232,7 +231,7 @@ async def ingest_data(
 @router.post("/file", response_model=IngestResponse, status_code=status.HTTP_202_ACCEPTED)
 async def ingest_file(
     request: IngestFileRequest,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserInternal = Depends(get_current_active_user),
 ) -> IngestResponse:
     """
     Ingest a file from the vault into the GraphRAG pipeline.
@@ -444,7 +443,7 @@ async def ingest_file(
 
 @router.get("/diagnostics", status_code=status.HTTP_200_OK)
 async def get_ingestion_diagnostics(
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserInternal = Depends(get_current_active_user),
 ) -> dict:
     """
     Get diagnostics for ingestion service (LLM configuration, pipeline status).
@@ -494,7 +493,7 @@ async def export_knowledge_graph(
     document_id: str | None = None,
     limit: int = 1000,
     include_isolated: bool = False,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserInternal = Depends(get_current_active_user),
 ) -> dict:
     """
     Export knowledge graph as JSON-compliant structure.
@@ -3,14 +3,95 @@ Search Endpoints
 Hybrid search (Vector + Graph) for intelligence queries.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import hashlib
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from neo4j.exceptions import ServiceUnavailable, SessionExpired
 from pydantic import BaseModel
 
-from app.core.security import User, get_current_active_user
+from app.core.database import get_neo4j_driver
+from app.core.security import UserInternal, get_current_active_user
 from app.services.graph_rag.search import HybridSearchService
 
 router = APIRouter()
 
+# Errors raised when Neo4j cannot be reached (DNS failure, refused, dropped)
+NEO4J_UNAVAILABLE_ERRORS = (ServiceUnavailable, SessionExpired)
+
+# HTTP caching for graph snapshots (they change slowly)
+GRAPH_CACHE_MAX_AGE_SECONDS = 60
+GRAPH_CACHE_CONTROL = f"private, max-age={GRAPH_CACHE_MAX_AGE_SECONDS}"
+
+# Bounds for graph query parameters (checked in the handlers, published via openapi_extra)
+GRAPH_ALL_LIMIT_MIN, GRAPH_ALL_LIMIT_MAX = 1, 1000
+GRAPH_DEPTH_MIN, GRAPH_DEPTH_MAX = 1, 5
+
+
+def _bounded_int_param(name: str, default: int, minimum: int, maximum: int, description: str) -> dict:
+    """
+    Build the OpenAPI description of a bounded integer query parameter.
+    
+    The matching Query() is left out of the schema: FastAPI appends
+    openapi_extra parameters to the generated ones instead of merging them.
+    
+    Args:
+        name: Query parameter name
+        default: Default value
+        minimum: Smallest accepted value
+        maximum: Largest accepted value
+        description: Parameter description
+        
+    Returns:
+        OpenAPI parameter object
+    """
+    return {
+        "name": name,
+        "in": "query",
+        "required": False,
+        "description": description,
+        "schema": {"type": "integer", "default": default, "minimum": minimum, "maximum": maximum},
+    }
+
+
+def _graph_response(request: Request, payload: dict) -> Response:
+    """
+    Serialize a graph snapshot with an ETag derived from its body.
+    
+    The graph is always fetched first, so a 304 is only sent when the
+    client's copy matches the current data (on any worker).
+    
+    Args:
+        request: Incoming request (If-None-Match header)
+        payload: Graph data with nodes and edges
+        
+    Returns:
+        304 Response if the client copy is current, else the JSON response
+    """
+    body = orjson.dumps(payload)
+    etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": GRAPH_CACHE_CONTROL}
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _get_request_driver(request: Request):
+    """
+    Get the pooled Neo4j driver created at application startup.
+    
+    Falls back to the module-level singleton if the lifespan hook did not
+    attach a driver (e.g. Neo4j was unavailable at startup).
+    
+    Raises:
+        RuntimeError: If Neo4j driver cannot be initialized
+    """
+    driver = getattr(request.app.state, "neo4j_driver", None)
+    if driver is None:
+        driver = get_neo4j_driver()
+    return driver
+
 
 # Request/Response Models
 class SearchRequest(BaseModel):
@@ -53,10 +134,16 @@ class SearchResponse(BaseModel):
     reasoning: str = ""
 
 
+# Resolve model schemas at import time so a missing forward reference fails
+# at startup instead of on the first request served by a worker
+for _model in (SearchRequest, Node, Edge, GraphPath, SearchResponse):
+    _model.model_rebuild()
+
+
 @router.post("/", response_model=SearchResponse, status_code=status.HTTP_200_OK)
 async def hybrid_search(
     request: SearchRequest,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserInternal = Depends(get_current_active_user),
 ) -> SearchResponse:
     """
     Perform hybrid search combining vector search and graph traversal.
@@ -121,27 +208,48 @@ async def hybrid_search(
         ) from e
 
 
-@router.get("/graph/all", status_code=status.HTTP_200_OK)
+@router.get(
+    "/graph/all",
+    status_code=status.HTTP_200_OK,
+    openapi_extra={
+        "parameters": [
+            _bounded_int_param(
+                "limit", 200, GRAPH_ALL_LIMIT_MIN, GRAPH_ALL_LIMIT_MAX,
+                "Maximum number of nodes to return",
+            ),
+        ],
+    },
+)
 async def get_all_graph_data(
-    limit: int = Query(200, ge=1, le=1000, description="Maximum number of nodes to return"),
-    current_user: User = Depends(get_current_active_user),
+    request: Request,
+    limit: int = Query(200, include_in_schema=False),
+    current_user: UserInternal = Depends(get_current_active_user),
 ) -> dict:
     """
     Get all graph data for visualization (all entities and relationships).
     
     Args:
+        request: Incoming request (used to reach the shared Neo4j driver)
         limit: Maximum number of nodes to return
         current_user: Current authenticated user
         
     Returns:
-        Graph data with nodes and edges
+        Graph data with nodes and edges (304 if the client copy is current)
+        
+    Raises:
+        HTTPException: If limit is out of range
     """
+    # Plain bounds check (cheaper than Query constraint validation)
+    if not GRAPH_ALL_LIMIT_MIN <= limit <= GRAPH_ALL_LIMIT_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"limit must be between {GRAPH_ALL_LIMIT_MIN} and {GRAPH_ALL_LIMIT_MAX}"
+        )
+    
     try:
-        from app.core.database import get_neo4j_driver
-        
         # Fixed: Check if Neo4j driver can be initialized
         try:
-            driver = get_neo4j_driver()
+            driver = _get_request_driver(request)
         except RuntimeError as e:
             # Neo4j not available - return empty graph gracefully
             return {
@@ -152,15 +260,17 @@ async def get_all_graph_data(
         # Query Neo4j for all nodes and relationships
         # Fixed: First get all nodes (even without relationships), then get relationships
         # This ensures we return nodes even if no relationships exist
+        # Project only the fields we serialize instead of shipping whole nodes/relationships
         nodes_query = """
         MATCH (n)
-        RETURN n
+        RETURN id(n) AS nid, labels(n) AS labels, properties(n) AS props
         LIMIT $node_limit
         """
         
         relationships_query = """
         MATCH (n)-[r]->(connected)
-        RETURN n, r, connected
+        RETURN id(n) AS source_nid, id(connected) AS target_nid,
+               type(r) AS rel_type, properties(r) AS rel_props
         LIMIT $rel_limit
         """
         
@@ -177,16 +287,15 @@ async def get_all_graph_data(
                 nodes_result = await session.run(nodes_query, node_limit=limit)
                 
                 async for record in nodes_result:
-                    if "n" in record:
-                        node = record["n"]
+                    if "nid" in record:
                         # Use the node's 'id' property if it exists, otherwise use Neo4j internal ID
-                        node_props = dict(node)
-                        node_id = node_props.get("id", str(node.id))
-                        neo4j_id = node.id
+                        node_props = record["props"]
+                        neo4j_id = record["nid"]
+                        node_id = node_props.get("id", str(neo4j_id))
                         
                         if node_id not in node_ids:
                             # Get label (entity type)
-                            labels = list(node.labels)
+                            labels = record["labels"]
                             label = labels[0] if labels else "ENTITY"
                             
                             # Use 'name' property for label if available, otherwise use ID
@@ -210,86 +319,91 @@ async def get_all_graph_data(
                     rel_result = await session.run(relationships_query, rel_limit=limit * 3)
                     
                     async for record in rel_result:
-                        if "r" in record and "n" in record and "connected" in record:
-                            rel = record["r"]
-                            source_node = record["n"]
-                            target_node = record["connected"]
-                            
-                            source_neo4j_id = source_node.id
-                            target_neo4j_id = target_node.id
+                        if "rel_type" in record:
+                            rel_type = record["rel_type"]
                             
                             # Only include if both nodes are in our node set
-                            source_id = node_id_map.get(source_neo4j_id)
-                            target_id = node_id_map.get(target_neo4j_id)
+                            source_id = node_id_map.get(record["source_nid"])
+                            target_id = node_id_map.get(record["target_nid"])
                             
                             if source_id and target_id:
-                                edge_key = f"{source_id}-{rel.type}-{target_id}"
+                                edge_key = f"{source_id}-{rel_type}-{target_id}"
                                 if edge_key not in edge_ids:
                                     edges.append({
                                         "source": source_id,
                                         "target": target_id,
-                                        "relationship": rel.type,
-                                        "properties": dict(rel),
+                                        "relationship": rel_type,
+                                        "properties": record["rel_props"],
                                     })
                                     edge_ids.add(edge_key)
-        except Exception as conn_error:
+        except NEO4J_UNAVAILABLE_ERRORS:
             # Fixed: Handle connection errors (Neo4j not running) gracefully
-            # Check if it's a connection error
-            error_msg = str(conn_error).lower()
-            if "resolve" in error_msg or "connection" in error_msg or "refused" in error_msg:
-                # Neo4j is not available - return empty graph
-                return {
-                    "nodes": [],
-                    "edges": [],
-                }
-            # Re-raise if it's a different error
-            raise
+            # Neo4j is not available - return empty graph
+            return {
+                "nodes": [],
+                "edges": [],
+            }
         
-        return {
+        return _graph_response(request, {
             "nodes": nodes,
             "edges": edges,
-        }
+        })
     except HTTPException:
         # Re-raise HTTP exceptions
         raise
     except Exception as e:
         # Fixed: Provide more specific error message
         error_detail = str(e)
-        if "resolve" in error_detail.lower() or "connection" in error_detail.lower():
-            # Return empty graph if Neo4j is not available
-            return {
-                "nodes": [],
-                "edges": [],
-            }
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve graph data: {error_detail}"
         ) from e
 
 
-@router.get("/graph", status_code=status.HTTP_200_OK)
+@router.get(
+    "/graph",
+    status_code=status.HTTP_200_OK,
+    openapi_extra={
+        "parameters": [
+            _bounded_int_param(
+                "depth", 2, GRAPH_DEPTH_MIN, GRAPH_DEPTH_MAX,
+                "Graph traversal depth",
+            ),
+        ],
+    },
+)
 async def get_graph_data(
+    request: Request,
     entity_name: str = Query(..., description="Entity name to find connections for"),
-    depth: int = Query(2, ge=1, le=5, description="Graph traversal depth"),
-    current_user: User = Depends(get_current_active_user),
+    depth: int = Query(2, include_in_schema=False),
+    current_user: UserInternal = Depends(get_current_active_user),
 ) -> dict:
     """
     Get graph data for visualization.
     
     Args:
+        request: Incoming request (used to reach the shared Neo4j driver)
         entity_name: Entity name to find connections for
         depth: Graph traversal depth
         current_user: Current authenticated user
         
     Returns:
-        Graph data with nodes and edges
+        Graph data with nodes and edges (304 if the client copy is current)
+        
+    Raises:
+        HTTPException: If depth is out of range
     """
+    # Plain bounds check (cheaper than Query constraint validation)
+    if not GRAPH_DEPTH_MIN <= depth <= GRAPH_DEPTH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"depth must be between {GRAPH_DEPTH_MIN} and {GRAPH_DEPTH_MAX}"
+        )
+    
     try:
-        from app.core.database import get_neo4j_driver
-        
         # Fixed: Check if Neo4j driver can be initialized
         try:
-            driver = get_neo4j_driver()
+            driver = _get_request_driver(request)
         except RuntimeError as e:
             # Neo4j not available - return empty graph gracefully
             return {
@@ -297,11 +411,16 @@ async def get_graph_data(
                 "edges": [],
             }
         
-        # Query Neo4j for entity and its connections
-        query = """
-        MATCH (n)-[r*1..$depth]-(connected)
+        # Query Neo4j for entity and its connections, projecting only serialized fields
+        # Fixed: Cypher does not accept parameters in variable-length bounds, so the
+        # (already range-checked) depth is inlined
+        query = f"""
+        MATCH (n)-[r*1..{depth}]-(connected)
         WHERE n.name = $entity_name OR n.id = $entity_name
-        RETURN n, r, connected
+        RETURN id(n) AS nid, labels(n) AS nlabels, properties(n) AS nprops,
+               id(connected) AS cid, labels(connected) AS clabels, properties(connected) AS cprops,
+               [rel IN r | {{source: id(startNode(rel)), target: id(endNode(rel)),
+                             type: type(rel), props: properties(rel)}}] AS rels
         LIMIT 100
         """
         
@@ -312,68 +431,51 @@ async def get_graph_data(
         # Fixed: Handle connection errors gracefully
         try:
             async with driver.session() as session:
-                result = await session.run(query, entity_name=entity_name, depth=depth)
+                result = await session.run(query, entity_name=entity_name)
                 
                 async for record in result:
                     # Extract nodes
-                    for node_key in ["n", "connected"]:
-                        if node_key in record:
-                            node = record[node_key]
-                            node_id = str(node.id)
+                    for id_key, labels_key, props_key in (
+                        ("nid", "nlabels", "nprops"),
+                        ("cid", "clabels", "cprops"),
+                    ):
+                        if id_key in record:
+                            node_id = str(record[id_key])
                             if node_id not in node_ids:
+                                labels = record[labels_key]
                                 nodes.append({
                                     "id": node_id,
-                                    "label": list(node.labels)[0] if node.labels else "ENTITY",
-                                    "properties": dict(node),
+                                    "label": labels[0] if labels else "ENTITY",
+                                    "properties": record[props_key],
                                 })
                                 node_ids.add(node_id)
                     
                     # Extract relationships
-                    if "r" in record:
-                        rels = record["r"]
-                        if isinstance(rels, list):
-                            for rel in rels:
-                                edges.append({
-                                    "source": str(rel.start_node.id),
-                                    "target": str(rel.end_node.id),
-                                    "relation": rel.type,
-                                    "properties": dict(rel),
-                                })
-                        else:
-                            edges.append({
-                                "source": str(rels.start_node.id),
-                                "target": str(rels.end_node.id),
-                                "relation": rels.type,
-                                "properties": dict(rels),
-                            })
-        except Exception as conn_error:
+                    for rel in record.get("rels") or []:
+                        edges.append({
+                            "source": str(rel["source"]),
+                            "target": str(rel["target"]),
+                            "relation": rel["type"],
+                            "properties": rel["props"],
+                        })
+        except NEO4J_UNAVAILABLE_ERRORS:
             # Fixed: Handle connection errors (Neo4j not running) gracefully
-            error_msg = str(conn_error).lower()
-            if "resolve" in error_msg or "connection" in error_msg or "refused" in error_msg:
-                # Neo4j is not available - return empty graph
-                return {
-                    "nodes": [],
-                    "edges": [],
-                }
-            # Re-raise if it's a different error
-            raise
+            # Neo4j is not available - return empty graph
+            return {
+                "nodes": [],
+                "edges": [],
+            }
         
-        return {
+        return _graph_response(request, {
             "nodes": nodes,
             "edges": edges,
-        }
+        })
     except HTTPException:
         # Re-raise HTTP exceptions
         raise
     except Exception as e:
-        # Fixed: Provide more specific error message and graceful degradation
+        # Fixed: Provide more specific error message
         error_detail = str(e)
-        if "resolve" in error_detail.lower() or "connection" in error_detail.lower():
-            # Return empty graph if Neo4j is not available
-            return {
-                "nodes": [],
-                "edges": [],
-            }
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve graph data: {error_detail}"
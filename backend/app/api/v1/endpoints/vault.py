@@ -5,11 +5,12 @@ Secure file vault operations (upload, list, download, delete).
 
 import logging
 
+import numpy as np
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
 from pydantic import BaseModel
 
-from app.core.security import User, get_current_active_user
-from app.services.vault_service import get_vault_service
+from app.core.security import UserInternal, get_current_active_user
+from app.services.vault_service import CLEARANCE_ORDER, get_vault_service
 
 logger = logging.getLogger(__name__)
 
@@ -42,9 +43,14 @@ class UploadFileResponse(BaseModel):
     uploaded_at: str
 
 
+# Resolve model schemas at import time (see search endpoints)
+for _model in (FileMetadataResponse, ListFilesResponse, UploadFileResponse):
+    _model.model_rebuild()
+
+
 @router.get("/files", response_model=ListFilesResponse, status_code=status.HTTP_200_OK)
 async def list_files(
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserInternal = Depends(get_current_active_user),
 ) -> ListFilesResponse:
     """
     List all files in the vault accessible to the current user.
@@ -57,16 +63,15 @@ async def list_files(
     """
     vault_service = get_vault_service()
     
-    # Get all files (in Phase 2, filter by user clearance level)
+    # Get all files with their precomputed clearance levels
     all_files = vault_service.list_files()
+    clearance_levels = vault_service.list_clearance_array()
     
-    # Filter files based on user clearance level
-    clearance_order = {"L1": 1, "L2": 2, "L3": 3}
-    user_level = clearance_order.get(current_user.clearance_level, 0)
+    # Filter files based on user clearance level (vectorized mask)
+    user_level = CLEARANCE_ORDER.get(current_user.clearance_level, 0)
     
     accessible_files = [
-        f for f in all_files
-        if clearance_order.get(f.clearance_level, 3) <= user_level
+        all_files[i] for i in np.flatnonzero(clearance_levels <= user_level)
     ]
     
     # Convert to response format
@@ -92,7 +97,7 @@ async def list_files(
 @router.post("/upload", response_model=UploadFileResponse, status_code=status.HTTP_201_CREATED)
 async def upload_file(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserInternal = Depends(get_current_active_user),
 ) -> UploadFileResponse:
     """
     Upload a file to the vault.
@@ -178,7 +183,7 @@ async def upload_file(
 @router.get("/files/{file_id}", status_code=status.HTTP_200_OK)
 async def download_file(
     file_id: str,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserInternal = Depends(get_current_active_user),
 ):
     """
     Download a file from the vault.
@@ -204,9 +209,8 @@ async def download_file(
         )
     
     # Check clearance level
-    clearance_order = {"L1": 1, "L2": 2, "L3": 3}
-    user_level = clearance_order.get(current_user.clearance_level, 0)
-    file_level = clearance_order.get(metadata.clearance_level, 3)
+    user_level = CLEARANCE_ORDER.get(current_user.clearance_level, 0)
+    file_level = CLEARANCE_ORDER.get(metadata.clearance_level, 3)
     
     if file_level > user_level:
         raise HTTPException(
@@ -236,7 +240,7 @@ async def download_file(
 @router.delete("/files/{file_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_file(
     file_id: str,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserInternal = Depends(get_current_active_user),
 ):
     """
     Delete a file from the vault.
@@ -52,6 +52,26 @@ class Settings(BaseSettings):
     )
     NEO4J_USER: str = Field(default="neo4j", description="Neo4j username")
     NEO4J_PASSWORD: str = Field(default="", description="Neo4j password")
+    NEO4J_MAX_CONNECTION_POOL_SIZE: int = Field(
+        default=50,
+        description="Maximum number of pooled Bolt connections per driver",
+    )
+    NEO4J_CONNECTION_ACQUISITION_TIMEOUT: float = Field(
+        default=30.0,
+        description="Seconds to wait for a free pooled connection",
+    )
+    NEO4J_MAX_CONNECTION_LIFETIME: int = Field(
+        default=3600,
+        description="Seconds before a pooled connection is recycled",
+    )
+    NEO4J_CONNECTION_TIMEOUT: float = Field(
+        default=15.0,
+        description="Seconds to wait when opening a new Bolt connection",
+    )
+    NEO4J_KEEP_ALIVE: bool = Field(
+        default=True,
+        description="Enable TCP keep-alive on pooled Bolt connections",
+    )
     
     # Qdrant
     QDRANT_URL: str = Field(
@@ -62,6 +82,38 @@ class Settings(BaseSettings):
         default="suraksh_documents",
         description="Default Qdrant collection name",
     )
+    QDRANT_PREFER_GRPC: bool = Field(
+        default=True,
+        description="Use gRPC instead of HTTP for Qdrant operations",
+    )
+    QDRANT_GRPC_PORT: int = Field(
+        default=6334,
+        description="Qdrant gRPC port",
+    )
+    QDRANT_QUANTIZATION: str = Field(
+        default="int8",
+        description="Vector quantization for new collections: int8, binary, or none",
+    )
+    QDRANT_VECTORS_ON_DISK: bool = Field(
+        default=True,
+        description="Keep original vectors on disk so only the quantized copy stays in RAM",
+    )
+    QDRANT_HNSW_ON_DISK: bool = Field(
+        default=False,
+        description="Keep the HNSW graph of new collections on disk (less RAM, slower cold search)",
+    )
+    QDRANT_SEARCH_OVERSAMPLING: float = Field(
+        default=2.0,
+        description="Oversampling factor for quantized search before rescoring",
+    )
+    QDRANT_UPSERT_BATCH_SIZE: int = Field(
+        default=32,
+        description="Points embedded and upserted per Qdrant request during ingestion",
+    )
+    QDRANT_UPSERT_CONCURRENCY: int = Field(
+        default=2,
+        description="Concurrent embed+upsert batches during ingestion",
+    )
     
     # MinIO Object Storage
     MINIO_ENDPOINT: str = Field(
@@ -114,6 +166,44 @@ class Settings(BaseSettings):
         description="LLM temperature for deterministic extraction",
     )
     
+    # Embeddings
+    EMBEDDING_BATCH_SIZE: int = Field(
+        default=64,
+        description="Number of texts sent per embedding API request",
+    )
+    EMBEDDING_CACHE_SIZE: int = Field(
+        default=10000,
+        description="Maximum number of embeddings kept in the in-process LRU cache",
+    )
+    
+    # GraphRAG extraction
+    EXTRACTION_CACHE_PATH: str = Field(
+        default="cache/extraction_cache.sqlite3",
+        description="SQLite file caching LLM extraction results (empty disables the cache)",
+    )
+    INGEST_EXTRACTION_CONCURRENCY: int = Field(
+        default=8,
+        description="Concurrent LLM extraction calls per ingested document (keep within provider rate limits)",
+    )
+    INGEST_BATCH_CONCURRENCY: int = Field(
+        default=2,
+        description="Documents ingested concurrently by IngestionPipeline.ingest_texts",
+    )
+    INGEST_OFFLOAD_MIN_CHARS: int = Field(
+        default=1_000_000,
+        description="Texts at least this long are hashed and chunked in a worker process",
+    )
+    INGEST_DEDUP_PATH: str = Field(
+        default="cache/ingest_hashes.sqlite3",
+        description="SQLite file recording content hashes of ingested texts (empty keeps them in memory)",
+    )
+    
+    # DeepSearch
+    DEEPSEARCH_SEMANTIC_CACHE: bool = Field(
+        default=False,
+        description="Serve near-duplicate DeepSearch queries from a semantic answer cache",
+    )
+    
     # OpenRouter Configuration
     OPENROUTER_BASE_URL: str = Field(
         default="https://openrouter.ai/api/v1",
@@ -3,25 +3,79 @@ Database Connection Clients
 Neo4j and Qdrant client initialization and management.
 """
 
-from typing import Optional, TYPE_CHECKING
+from typing import Dict, Optional, Set, TYPE_CHECKING
 
 from neo4j import AsyncGraphDatabase
 from qdrant_client import AsyncQdrantClient
-from qdrant_client.models import Distance, VectorParams
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Distance,
+    HnswConfigDiff,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams,
+)
 
 from app.core.config import settings
+from app.core.loop_scoped import get_loop_scoped, pop_loop_scoped
 
 if TYPE_CHECKING:
     from neo4j import AsyncDriver
 
-# Global client instances
-_neo4j_driver: Optional["AsyncDriver"] = None
-_qdrant_client: Optional[AsyncQdrantClient] = None
+# Global client instances, keyed by id() of the event loop they were created on
+# (async clients are bound to the loop that created them). They are not closed
+# when a loop goes away: close_neo4j_driver()/close_qdrant_client() must run on
+# the owning loop before it shuts down
+_neo4j_drivers: Dict[int, "AsyncDriver"] = {}
+_qdrant_clients: Dict[int, AsyncQdrantClient] = {}
+
+# Collections confirmed to exist in this process (existence is stable once created)
+_known_collections: Set[str] = set()
+
+
+def _build_neo4j_driver() -> "AsyncDriver":
+    """Create a new Neo4j async driver from settings."""
+    return AsyncGraphDatabase.driver(
+        settings.NEO4J_URI,
+        auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD),
+        max_connection_pool_size=settings.NEO4J_MAX_CONNECTION_POOL_SIZE,
+        connection_acquisition_timeout=settings.NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+        max_connection_lifetime=settings.NEO4J_MAX_CONNECTION_LIFETIME,
+        connection_timeout=settings.NEO4J_CONNECTION_TIMEOUT,
+        keep_alive=settings.NEO4J_KEEP_ALIVE,
+    )
+
+
+# Allow large upsert batches over gRPC (default message limit is 4 MB)
+QDRANT_GRPC_MAX_MESSAGE_LENGTH = 100 * 1024 * 1024
+
+
+def _build_qdrant_client() -> AsyncQdrantClient:
+    """
+    Create a new Qdrant async client from settings.
+    
+    gRPC avoids JSON encoding of dense float vectors; bulk writers should
+    upsert points in groups of roughly 256-1024 with wait=False.
+    """
+    return AsyncQdrantClient(
+        url=settings.QDRANT_URL,
+        prefer_grpc=settings.QDRANT_PREFER_GRPC,
+        grpc_port=settings.QDRANT_GRPC_PORT,
+        grpc_options={
+            "grpc.max_send_message_length": QDRANT_GRPC_MAX_MESSAGE_LENGTH,
+            "grpc.max_receive_message_length": QDRANT_GRPC_MAX_MESSAGE_LENGTH,
+        },
+        check_compatibility=False,  # Suppress version warning for Docker image compatibility
+    )
 
 
 def get_neo4j_driver() -> "AsyncDriver":
     """
-    Get or create Neo4j async driver instance.
+    Get or create Neo4j async driver instance for the running event loop.
     
     Returns:
         Neo4j async driver instance
@@ -29,32 +83,23 @@ def get_neo4j_driver() -> "AsyncDriver":
     Raises:
         RuntimeError: If Neo4j driver cannot be initialized
     """
-    global _neo4j_driver
-    
-    if _neo4j_driver is None:
-        try:
-            _neo4j_driver = AsyncGraphDatabase.driver(
-                settings.NEO4J_URI,
-                auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD),
-            )
-        except Exception as e:
-            raise RuntimeError(f"Failed to initialize Neo4j driver: {e}") from e
-    
-    return _neo4j_driver
+    try:
+        return get_loop_scoped(_neo4j_drivers, _build_neo4j_driver)
+    except Exception as e:
+        raise RuntimeError(f"Failed to initialize Neo4j driver: {e}") from e
 
 
 async def close_neo4j_driver() -> None:
-    """Close Neo4j driver connection."""
-    global _neo4j_driver
+    """Close the Neo4j driver bound to the running event loop."""
+    driver = pop_loop_scoped(_neo4j_drivers)
     
-    if _neo4j_driver is not None:
-        await _neo4j_driver.close()
-        _neo4j_driver = None
+    if driver is not None:
+        await driver.close()
 
 
 def get_qdrant_client() -> AsyncQdrantClient:
     """
-    Get or create Qdrant async client instance.
+    Get or create Qdrant async client instance for the running event loop.
     
     Returns:
         Qdrant async client instance
@@ -62,18 +107,58 @@ def get_qdrant_client() -> AsyncQdrantClient:
     Raises:
         RuntimeError: If Qdrant client cannot be initialized
     """
-    global _qdrant_client
+    try:
+        return get_loop_scoped(_qdrant_clients, _build_qdrant_client)
+    except Exception as e:
+        raise RuntimeError(f"Failed to initialize Qdrant client: {e}") from e
+
+
+async def close_qdrant_client() -> None:
+    """Close the Qdrant client bound to the running event loop."""
+    client = pop_loop_scoped(_qdrant_clients)
     
-    if _qdrant_client is None:
-        try:
-            _qdrant_client = AsyncQdrantClient(
-                url=settings.QDRANT_URL,
-                check_compatibility=False,  # Suppress version warning for Docker image compatibility
-            )
-        except Exception as e:
-            raise RuntimeError(f"Failed to initialize Qdrant client: {e}") from e
+    if client is not None:
+        await client.close()
+
+
+def get_qdrant_quantization_config():
+    """
+    Build the quantization config for new Qdrant collections.
     
-    return _qdrant_client
+    Returns:
+        Scalar (int8) or binary quantization config, or None when disabled
+    """
+    mode = settings.QDRANT_QUANTIZATION.lower()
+    if mode == "int8":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True,
+            ),
+        )
+    if mode == "binary":
+        return BinaryQuantization(
+            binary=BinaryQuantizationConfig(always_ram=True),
+        )
+    return None
+
+
+def get_qdrant_search_params() -> Optional[SearchParams]:
+    """
+    Build search params that rescore quantized candidates with the original vectors.
+    
+    Returns:
+        Search params for quantized collections, or None when quantization is disabled
+    """
+    if settings.QDRANT_QUANTIZATION.lower() not in ("int8", "binary"):
+        return None
+    return SearchParams(
+        quantization=QuantizationSearchParams(
+            rescore=True,
+            oversampling=settings.QDRANT_SEARCH_OVERSAMPLING,
+        ),
+    )
 
 
 async def ensure_qdrant_collection(collection_name: Optional[str] = None) -> None:
@@ -89,6 +174,9 @@ async def ensure_qdrant_collection(collection_name: Optional[str] = None) -> Non
     if collection_name is None:
         collection_name = settings.QDRANT_COLLECTION_NAME
     
+    if collection_name in _known_collections:
+        return
+    
     client = get_qdrant_client()
     
     try:
@@ -108,11 +196,15 @@ async def ensure_qdrant_collection(collection_name: Optional[str] = None) -> Non
                 vectors_config=VectorParams(
                     size=dimension,
                     distance=Distance.COSINE,
+                    on_disk=settings.QDRANT_VECTORS_ON_DISK,
                 ),
+                quantization_config=get_qdrant_quantization_config(),
+                hnsw_config=HnswConfigDiff(on_disk=settings.QDRANT_HNSW_ON_DISK),
             )
             print(f"[OK] Created Qdrant collection: {collection_name}")
         else:
             print(f"[OK] Qdrant collection exists: {collection_name}")
+        _known_collections.add(collection_name)
     except Exception as e:
         raise RuntimeError(f"Failed to ensure Qdrant collection exists: {e}") from e
 
@@ -147,4 +239,3 @@ async def verify_qdrant_connection() -> bool:
         return True
     except Exception:
         return False
-
@@ -0,0 +1,148 @@
+"""
+Debug Event Log
+Non-blocking agent debug log: events are queued on the request path and
+written to disk in batches by a single background task.
+"""
+
+import asyncio
+import io
+import os
+import time
+from typing import Any, BinaryIO, Dict, List, Optional
+
+import orjson
+
+DEBUG_LOG_PATH = r'd:\Hacakathons\Suraksh\.cursor\debug.log'
+
+# Agent logging is opt-in; call sites check this flag before building the event
+AGENT_LOG_ENABLED = bool(os.getenv("SURAKSH_AGENT_LOG"))
+
+# Bounded so a stalled disk can never grow memory; events are dropped when full
+DEBUG_LOG_QUEUE_SIZE = 10000
+DEBUG_LOG_BATCH_SIZE = 512
+# Buffer writes and flush after this many batches or this many seconds, whichever comes first
+DEBUG_LOG_BUFFER_SIZE = 65536
+DEBUG_LOG_FLUSH_EVERY = 64
+DEBUG_LOG_FLUSH_INTERVAL = 0.1
+
+_queue: Optional["asyncio.Queue[Dict[str, Any]]"] = None
+_writer_task: Optional["asyncio.Task[None]"] = None
+
+
+def _get_queue() -> "asyncio.Queue[Dict[str, Any]]":
+    """Lazy initialization of the event queue."""
+    global _queue
+    if _queue is None:
+        _queue = asyncio.Queue(maxsize=DEBUG_LOG_QUEUE_SIZE)
+    return _queue
+
+
+def log_event(entry: Dict[str, Any]) -> None:
+    """
+    Queue a debug event for the background writer.
+    
+    Never blocks and never raises; the event is dropped if the queue is full.
+    
+    Args:
+        entry: JSON-serializable event dict
+    """
+    try:
+        _get_queue().put_nowait(entry)
+    except asyncio.QueueFull:
+        pass
+
+
+def _open_log_file() -> Optional[BinaryIO]:
+    """Open the debug log for buffered binary appending, or None if it isn't writable."""
+    try:
+        return io.BufferedWriter(open(DEBUG_LOG_PATH, 'ab', buffering=0), buffer_size=DEBUG_LOG_BUFFER_SIZE)
+    except OSError:
+        return None
+
+
+def _encode_entry(entry: Dict[str, Any]) -> bytes:
+    """Serialize one event as a JSON line; unserializable events are dropped."""
+    try:
+        return orjson.dumps(entry, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    except orjson.JSONEncodeError:
+        return b""
+
+
+def _write_batch(log_file: BinaryIO, batch: List[Dict[str, Any]], flush: bool) -> None:
+    """Serialize and write a batch of events (runs in a worker thread)."""
+    try:
+        if batch:
+            log_file.write(b"".join(_encode_entry(entry) for entry in batch))
+        if flush:
+            log_file.flush()
+    except (OSError, ValueError):
+        pass
+
+
+async def _drain() -> None:
+    """Consume queued events and append them to the debug log in batches."""
+    queue = _get_queue()
+    loop = asyncio.get_running_loop()
+    log_file = await loop.run_in_executor(None, _open_log_file)
+    batches = 0
+    last_flush = time.monotonic()
+    dirty = False
+    
+    try:
+        while True:
+            if dirty:
+                # Wake up after the flush interval so buffered events don't linger when traffic stops
+                try:
+                    first = await asyncio.wait_for(queue.get(), DEBUG_LOG_FLUSH_INTERVAL)
+                except asyncio.TimeoutError:
+                    await loop.run_in_executor(None, _write_batch, log_file, [], True)
+                    last_flush = time.monotonic()
+                    dirty = False
+                    continue
+            else:
+                first = await queue.get()
+            
+            batch = [first]
+            while len(batch) < DEBUG_LOG_BATCH_SIZE and not queue.empty():
+                batch.append(queue.get_nowait())
+            
+            if log_file is None:
+                continue
+            
+            batches += 1
+            now = time.monotonic()
+            flush = batches % DEBUG_LOG_FLUSH_EVERY == 0 or now - last_flush >= DEBUG_LOG_FLUSH_INTERVAL
+            await loop.run_in_executor(None, _write_batch, log_file, batch, flush)
+            if flush:
+                last_flush = now
+            dirty = not flush
+    finally:
+        if log_file is not None:
+            remaining = []
+            while not queue.empty():
+                remaining.append(queue.get_nowait())
+            _write_batch(log_file, remaining, flush=True)
+            log_file.close()
+
+
+def start_debug_log_writer() -> None:
+    """Start the background writer task on the running event loop (no-op when disabled)."""
+    global _writer_task
+    if not AGENT_LOG_ENABLED:
+        return
+    if _writer_task is None or _writer_task.done():
+        _writer_task = asyncio.get_running_loop().create_task(_drain())
+
+
+async def stop_debug_log_writer() -> None:
+    """Stop the background writer, flushing any queued events."""
+    global _writer_task
+    if _writer_task is None:
+        return
+    
+    _writer_task.cancel()
+    try:
+        await _writer_task
+    except asyncio.CancelledError:
+        pass
+    _writer_task = None
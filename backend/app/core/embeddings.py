@@ -3,13 +3,97 @@ Embedding Service
 Generates text embeddings for vector search using OpenAI or local models.
 """
 
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
 from typing import List, Optional
 
+import numpy as np
+import openai
 from llama_index.core.embeddings import BaseEmbedding
 from llama_index.embeddings.openai import OpenAIEmbedding
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+# OpenAI text-embedding-3-small has 1536 dimensions
+EMBEDDING_DIMENSION = 1536
+
+# Errors worth retrying with backoff; anything else is treated as permanent
+TRANSIENT_EMBEDDING_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+# Errors caused by the input itself; only these are worth retrying text by text
+INPUT_EMBEDDING_ERRORS = (
+    openai.BadRequestError,
+    openai.UnprocessableEntityError,
+)
+
+_retry_transient = retry(
+    stop=stop_after_attempt(4),
+    wait=wait_random_exponential(min=1, max=20),
+    retry=retry_if_exception_type(TRANSIENT_EMBEDDING_ERRORS),
+    reraise=True,
+)
+
+
+def _to_vector(embedding: List[float]) -> np.ndarray:
+    """Convert an embedding to a read-only float32 vector (safe to share from the cache)."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    vector.setflags(write=False)
+    return vector
+
+
+class EmbeddingCache:
+    """
+    Exact-match LRU cache of embeddings keyed by a digest of the normalized text.
+    """
+    
+    def __init__(self, maxsize: int):
+        """
+        Initialize embedding cache.
+        
+        Args:
+            maxsize: Maximum number of cached embeddings (0 disables caching)
+        """
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+    
+    @staticmethod
+    def key_for(text: str) -> bytes:
+        """
+        Build the cache key for a text.
+        
+        Args:
+            text: Input text
+            
+        Returns:
+            16-byte BLAKE2b digest of the stripped, lower-cased text
+        """
+        return hashlib.blake2b(text.strip().lower().encode("utf-8"), digest_size=16).digest()
+    
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        """Get a cached embedding and mark it as recently used."""
+        embedding = self._entries.get(key)
+        if embedding is not None:
+            self._entries.move_to_end(key)
+        return embedding
+    
+    def put(self, key: bytes, embedding: np.ndarray) -> None:
+        """Store an embedding, evicting the least recently used entry if full."""
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
 
 class EmbeddingService:
     """
@@ -28,6 +112,8 @@ class EmbeddingService:
             self.embedding_model = self._get_default_embedding_model()
         else:
             self.embedding_model = embedding_model
+        
+        self._cache = EmbeddingCache(settings.EMBEDDING_CACHE_SIZE)
     
     def _get_default_embedding_model(self) -> BaseEmbedding:
         """
@@ -55,44 +141,117 @@ class EmbeddingService:
             model="text-embedding-3-small",
         )
     
-    async def get_embedding(self, text: str) -> List[float]:
+    async def get_embedding(self, text: str) -> np.ndarray:
         """
         Get embedding for a single text.
         
+        Repeated texts are served from the in-process LRU cache. Transient
+        API errors are retried with jittered exponential backoff.
+        
         Args:
             text: Input text
             
         Returns:
-            Embedding vector as list of floats
+            Embedding vector as a read-only float32 array
+            
+        Raises:
+            Exception: If the embedding cannot be generated after retries
         """
+        key = EmbeddingCache.key_for(text)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        
         try:
-            # Get embedding
-            embedding = await self.embedding_model.aget_query_embedding(text)
-            return embedding
+            embedding = await self._aget_one(text)
         except Exception as e:
-            # Fallback: return zero vector if embedding fails
-            print(f"Warning: Failed to generate embedding: {e}")
-            # Return zero vector with default dimension (1536 for text-embedding-3-small)
-            return [0.0] * 1536
+            # Raise instead of returning a zero vector, which would be stored as an unmatchable point
+            logger.warning("Failed to generate embedding: %s", e)
+            raise
+        
+        self._cache.put(key, embedding)
+        return embedding
+    
+    @_retry_transient
+    async def _aget_one(self, text: str) -> np.ndarray:
+        """Embed a single text, retrying transient API errors."""
+        return _to_vector(await self.embedding_model.aget_query_embedding(text))
     
-    async def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+    @_retry_transient
+    async def _aget_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed a batch of texts, retrying transient API errors."""
+        return [
+            _to_vector(embedding)
+            for embedding in await self.embedding_model.aget_text_embedding_batch(texts)
+        ]
+    
+    async def get_embeddings(self, texts: List[str]) -> np.ndarray:
         """
         Get embeddings for multiple texts (batch).
         
+        Cached texts are served locally; the remaining texts are split into
+        sub-batches of settings.EMBEDDING_BATCH_SIZE which are embedded
+        concurrently. Output order matches input order.
+        
         Args:
             texts: List of input texts
             
         Returns:
-            List of embedding vectors
+            float32 array of shape (len(texts), dimension)
+            
+        Raises:
+            Exception: If any text cannot be embedded after retries
+        """
+        if not texts:
+            return np.zeros((0, self.get_embedding_dimension()), dtype=np.float32)
+        
+        keys = [EmbeddingCache.key_for(text) for text in texts]
+        embeddings: List[Optional[np.ndarray]] = [self._cache.get(key) for key in keys]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not missing:
+            return np.stack(embeddings)
+        
+        batch_size = max(1, settings.EMBEDDING_BATCH_SIZE)
+        chunks = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+        
+        results = await asyncio.gather(*(
+            self._embed_chunk([texts[i] for i in chunk], [keys[i] for i in chunk])
+            for chunk in chunks
+        ))
+        for chunk, chunk_embeddings in zip(chunks, results):
+            for i, embedding in zip(chunk, chunk_embeddings):
+                embeddings[i] = embedding
+        
+        return np.stack(embeddings)
+    
+    async def _embed_chunk(self, texts: List[str], keys: List[bytes]) -> List[np.ndarray]:
+        """
+        Embed one sub-batch, falling back to per-text calls if an input is rejected.
+        
+        The per-text fallback means a single bad input doesn't fail the
+        whole batch; a text that still cannot be embedded raises. Rate-limit,
+        connection and server errors (already retried with backoff) are
+        re-raised instead, since fanning out into one call per text would
+        only add load to an overloaded provider.
+        
+        Args:
+            texts: Sub-batch of input texts
+            keys: Cache keys for the texts
+            
+        Returns:
+            List of embedding vectors for the sub-batch
         """
         try:
-            # Get embeddings in batch
-            embeddings = await self.embedding_model.aget_text_embedding_batch(texts)
-            return embeddings
-        except Exception as e:
-            # Fallback: return zero vectors if embedding fails
-            print(f"Warning: Failed to generate embeddings: {e}")
-            return [[0.0] * 1536 for _ in texts]
+            embeddings = await self._aget_batch(texts)
+        except INPUT_EMBEDDING_ERRORS as e:
+            if len(texts) == 1:
+                raise
+            logger.warning("Failed to generate embeddings for batch of %d, retrying per text: %s", len(texts), e)
+            return list(await asyncio.gather(*(self.get_embedding(text) for text in texts)))
+        
+        for key, embedding in zip(keys, embeddings):
+            self._cache.put(key, embedding)
+        return embeddings
     
     def get_embedding_dimension(self) -> int:
         """
@@ -101,8 +260,7 @@ class EmbeddingService:
         Returns:
             Embedding dimension
         """
-        # OpenAI text-embedding-3-small has 1536 dimensions
-        return 1536
+        return EMBEDDING_DIMENSION
 
 
 # Global embedding service instance
@@ -126,10 +284,10 @@ def get_embedding_service() -> EmbeddingService:
             # that returns zero vectors (for development/testing)
             class FallbackEmbedding:
                 async def aget_query_embedding(self, text: str):
-                    return [0.0] * 1536
+                    return [0.0] * EMBEDDING_DIMENSION
                 
                 async def aget_text_embedding_batch(self, texts: List[str]):
-                    return [[0.0] * 1536 for _ in texts]
+                    return [[0.0] * EMBEDDING_DIMENSION for _ in texts]
             
             from llama_index.core.embeddings import BaseEmbedding
             fallback = FallbackEmbedding()
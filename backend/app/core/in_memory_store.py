@@ -4,51 +4,41 @@ Temporary storage for users.
 Will be replaced with database in Phase 2.
 """
 
-from typing import Dict, Optional
+from typing import Dict, NamedTuple, Optional
 
-# Import User for type hints (circular import is avoided by lazy import in security.py)
-from app.core.security import User
+# Import UserInternal for type hints (circular import is avoided by lazy import in security.py)
+from app.core.security import UserInternal
 
 
-def _init_default_users() -> Dict[str, dict]:
+class UserRecord(NamedTuple):
+    """Stored user: the user object plus its password hash."""
+    user: UserInternal
+    hashed_password: bytes
+
+
+def _init_default_users() -> Dict[str, UserRecord]:
     """
     Initialize default users with hashed passwords.
     All default users have password: "test"
     """
     # Fixed: Use pre-computed bcrypt hash to avoid passlib/bcrypt compatibility issues
     # This hash corresponds to password "test" generated with bcrypt
-    hashed_password = "$2b$12$GGQR5DvvsJIRNxDRUGoRiuiWKXhxtLTt.5BAcNSmbvWMY7ETv9nIG"
+    # Stored as bytes so verification doesn't re-encode it on every login
+    hashed_password = b"$2b$12$GGQR5DvvsJIRNxDRUGoRiuiWKXhxtLTt.5BAcNSmbvWMY7ETv9nIG"
     
-    return {
-        "test": {
-            "username": "test",
-            "email": "test@suraksh.local",
-            "hashed_password": hashed_password,
-            "clearance_level": "L1",
-            "is_active": True,
-        },
-        "admin": {
-            "username": "admin",
-            "email": "admin@suraksh.local",
-            "hashed_password": hashed_password,
-            "clearance_level": "L3",
-            "is_active": True,
-        },
-        "analyst": {
-            "username": "analyst",
-            "email": "analyst@suraksh.local",
-            "hashed_password": hashed_password,
-            "clearance_level": "L2",
-            "is_active": True,
-        },
-    }
-
-
-# In-memory user store
+    users = [
+        UserInternal(username="test", email="test@suraksh.local", clearance_level="L1", is_active=True),
+        UserInternal(username="admin", email="admin@suraksh.local", clearance_level="L3", is_active=True),
+        UserInternal(username="analyst", email="analyst@suraksh.local", clearance_level="L2", is_active=True),
+    ]
+    return {user.username: UserRecord(user, hashed_password) for user in users}
+
+
+# In-memory user store (user objects are built once and reused on every request)
 # Fixed: Initialize lazily to avoid import-time bcrypt errors
-_users: Optional[Dict[str, dict]] = None
+_users: Optional[Dict[str, UserRecord]] = None
 
-def _get_users() -> Dict[str, dict]:
+def _get_users() -> Dict[str, UserRecord]:
     """Lazy initialization of users."""
     global _users
     if _users is None:
@@ -56,7 +46,7 @@ def _get_users() -> Dict[str, dict]:
     return _users
 
 
-def get_user_by_username(username: str) -> Optional[User]:
+def get_user_by_username(username: str) -> Optional[UserInternal]:
     """
     Get user by username from in-memory store.
     
@@ -64,21 +54,13 @@ def get_user_by_username(username: str) -> Optional[User]:
         username: Username to lookup
         
     Returns:
-        User object if found, None otherwise
+        UserInternal object if found, None otherwise
     """
-    users = _get_users()
-    user_data = users.get(username)
-    if user_data:
-        return User(
-            username=user_data["username"],
-            email=user_data["email"],
-            clearance_level=user_data["clearance_level"],
-            is_active=user_data["is_active"],
-        )
-    return None
-
-
-def get_user_with_password(username: str) -> Optional[dict]:
+    record = _get_users().get(username)
+    return record.user if record is not None else None
+
+
+def get_user_with_password(username: str) -> Optional[UserRecord]:
     """
     Get user with password hash for authentication.
     
@@ -86,10 +68,9 @@ def get_user_with_password(username: str) -> Optional[dict]:
         username: Username to lookup
         
     Returns:
-        User dict with password hash if found, None otherwise
+        UserRecord (user, hashed_password) if found, None otherwise
     """
-    users = _get_users()
-    return users.get(username)
+    return _get_users().get(username)
 
 
 def create_user(
@@ -97,7 +78,7 @@ def create_user(
     email: str,
     hashed_password: str,
     clearance_level: str,
-) -> User:
+) -> UserInternal:
     """
     Create a new user in in-memory store.
     
@@ -108,23 +89,34 @@ def create_user(
         clearance_level: Clearance level (L1, L2, L3)
         
     Returns:
-        Created User object
+        Created UserInternal object
+        
+    Raises:
+        ValueError: If the username is already registered
     """
     users = _get_users()
-    users[username] = {
-        "username": username,
-        "email": email,
-        "hashed_password": hashed_password,
-        "clearance_level": clearance_level,
-        "is_active": True,
-    }
+    if username in users:
+        raise ValueError(f"Username already registered: {username}")
     
-    return User(
+    user = UserInternal(
         username=username,
         email=email,
         clearance_level=clearance_level,
         is_active=True,
     )
+    users[username] = UserRecord(user, hashed_password.encode('utf-8'))
+    return user
 
 
-
+def update_user_password_hash(username: str, hashed_password: str) -> None:
+    """
+    Replace a user's stored password hash (e.g. after re-hashing on login).
+    
+    Args:
+        username: Username
+        hashed_password: New hashed password
+    """
+    users = _get_users()
+    record = users.get(username)
+    if record is not None:
+        users[username] = record._replace(hashed_password=hashed_password.encode('utf-8'))
@@ -3,24 +3,55 @@ LLM Factory for GraphRAG
 Supports OpenRouter (DeepSeek) and OpenAI with LlamaIndex integration.
 """
 
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
+import httpx
 # Fixed: Corrected import path for LLM
 from llama_index.core.llms import LLM
 from llama_index.llms.openai import OpenAI
 from openai import OpenAI as OpenAIClient
 
 from app.core.config import settings
+from app.core.loop_scoped import get_loop_scoped, pop_loop_scoped
+
+# Keep-alive pool shared by all async calls through one LLM instance
+LLM_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+# LLM instances and their async HTTP clients, keyed by id() of the event loop they
+# were created on (0 outside a loop); closed explicitly by close_llm() at loop shutdown
+_llm_instances: Dict[int, Tuple[LLM, httpx.AsyncClient]] = {}
 
 
 def get_llm() -> LLM:
     """
-    Factory function to create LLM instance based on configuration.
+    Get or create the LLM instance for the running event loop.
     Uses OpenRouter API with DeepSeek model by default.
     
     Returns:
         LLM instance (OpenAI-compatible via OpenRouter)
         
+    Raises:
+        ValueError: If provider is not supported or API key is missing
+    """
+    llm, _ = get_loop_scoped(_llm_instances, _build_llm)
+    return llm
+
+
+async def close_llm() -> None:
+    """Close the async HTTP client of the LLM bound to the running event loop."""
+    entry = pop_loop_scoped(_llm_instances)
+    if entry is not None:
+        _, http_client = entry
+        await http_client.aclose()
+
+
+def _build_llm() -> Tuple[LLM, httpx.AsyncClient]:
+    """
+    Create LLM instance based on configuration.
+    
+    Returns:
+        LLM instance (OpenAI-compatible via OpenRouter) and the async HTTP client it owns
+        
     Raises:
         ValueError: If provider is not supported or API key is missing
     """
@@ -41,28 +72,36 @@ def get_llm() -> LLM:
         # Configure OpenAI client to use OpenRouter base URL
         base_url = settings.OPENROUTER_BASE_URL or "https://openrouter.ai/api/v1"
         
-        # Create OpenAI client with OpenRouter configuration
-        client_kwargs = {
-            "api_key": api_key,
-            "base_url": base_url,
-        }
-        
         # Add OpenRouter-specific headers if using OpenRouter
+        default_headers = None
         if base_url == "https://openrouter.ai/api/v1":
-            client_kwargs["default_headers"] = {
+            default_headers = {
                 "HTTP-Referer": settings.OPENROUTER_HTTP_REFERER or "https://suraksh.local",
                 "X-Title": settings.OPENROUTER_SITE_NAME or "Suraksh Portal",
             }
         
-        # Create OpenAI client instance
-        openai_client = OpenAIClient(**client_kwargs)
+        # Create OpenAI client with OpenRouter configuration (sync fallback path)
+        openai_client = OpenAIClient(
+            api_key=api_key,
+            base_url=base_url,
+            default_headers=default_headers,
+        )
+        
+        # All LLM calls go through acomplete/astream_complete, so the tuned
+        # keep-alive pool belongs on the async client
+        async_http_client = httpx.AsyncClient(limits=LLM_HTTP_LIMITS)
         
-        # Pass client to LlamaIndex OpenAI wrapper
-        return OpenAI(
+        # Pass clients to LlamaIndex OpenAI wrapper
+        llm = OpenAI(
             client=openai_client,
+            api_key=api_key,
+            api_base=base_url,
+            default_headers=default_headers,
+            async_http_client=async_http_client,
             model=model_name,
             temperature=settings.LLM_TEMPERATURE,
         )
+        return llm, async_http_client
     
     else:
         raise ValueError(
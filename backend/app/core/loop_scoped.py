@@ -0,0 +1,87 @@
+"""
+Loop-Scoped Registries
+Per-event-loop instance registries for async clients bound to the loop that created them.
+
+Instances are never closed automatically: an async client can only be closed
+on its own loop, so owners must pop_loop_scoped() and close the instance
+before that loop shuts down (see the application lifespan).
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Callable, Dict, Optional, TypeVar
+
+_T = TypeVar("_T")
+
+_registry_lock = threading.Lock()
+
+
+def running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    """Return the running event loop, or None when called outside of one."""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _loop_key(loop: Optional[asyncio.AbstractEventLoop]) -> int:
+    """Registry key for a loop (0 outside a loop)."""
+    return id(loop) if loop is not None else 0
+
+
+def _forget(registry: Dict[int, _T], loop_id: int) -> None:
+    """Drop a collected loop's key so a new loop reusing its id() starts fresh."""
+    with _registry_lock:
+        registry.pop(loop_id, None)
+
+
+def get_loop_scoped(registry: Dict[int, _T], build: Callable[[], _T]) -> _T:
+    """
+    Get or create the instance for the running event loop.
+
+    If the loop is garbage collected its key is dropped, without closing the
+    instance; an instance holding open connections keeps its loop alive, so
+    callers must close it explicitly at loop shutdown.
+
+    Args:
+        registry: Per-loop instance registry, keyed by id() of the loop
+        build: Factory called when the loop has no instance yet
+
+    Returns:
+        Instance bound to the running loop
+    """
+    loop = running_loop()
+    loop_id = _loop_key(loop)
+
+    with _registry_lock:
+        instance = registry.get(loop_id)
+    if instance is not None:
+        return instance
+
+    # Build outside the lock; per-loop callers share a thread, so a lost race
+    # is only possible outside a loop and the unused instance is just dropped
+    instance = build()
+    with _registry_lock:
+        existing = registry.get(loop_id)
+        if existing is not None:
+            return existing
+        registry[loop_id] = instance
+    if loop is not None:
+        weakref.finalize(loop, _forget, registry, loop_id)
+
+    return instance
+
+
+def pop_loop_scoped(registry: Dict[int, _T]) -> Optional[_T]:
+    """
+    Remove and return the instance for the running event loop.
+
+    Args:
+        registry: Per-loop instance registry
+
+    Returns:
+        The removed instance, or None if the loop had none
+    """
+    with _registry_lock:
+        return registry.pop(_loop_key(running_loop()), None)
@@ -3,23 +3,67 @@ Suraksh Backend Security Module
 JWT authentication, password hashing, and Post-Quantum Cryptography (PQC) utilities.
 """
 
-from datetime import datetime, timedelta
-from typing import Literal, Optional
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Literal, Optional, Tuple, Union
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import JWTError, jwt
+import bcrypt
+import jwt
+import orjson
 from passlib.context import CryptContext
 from pydantic import BaseModel
 
 from app.core.config import settings
 
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# New hashes use argon2id; bcrypt hashes still verify and are re-hashed on next login
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated=["bcrypt"],
+    argon2__type="ID",
+    argon2__time_cost=2,
+    argon2__memory_cost=19456,
+    argon2__parallelism=1,
+)
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
 
+# JWS signer/verifier; claims are (de)serialized with orjson rather than stdlib json
+_jws = jwt.PyJWS()
+
+# JWT settings resolved once at import instead of on every sign/verify
+_JWT_KEY = settings.JWT_SECRET_KEY.encode('utf-8')
+_JWT_ALGORITHM = settings.JWT_ALGORITHM
+_JWT_ALGORITHMS = [_JWT_ALGORITHM]
+_JWT_TTL_SECONDS = settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+# Decoded token payloads, keyed by token string: token -> (expires_at, payload)
+TOKEN_CACHE_MAX_SIZE = 10_000
+TOKEN_CACHE_TTL_SECONDS = 60
+_token_cache: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+
+# Dedicated pool for CPU-bound password hashing so logins don't starve the default executor
+_password_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_password_executor() -> ThreadPoolExecutor:
+    """Lazy initialization of the password hashing thread pool."""
+    global _password_executor
+    if _password_executor is None:
+        _password_executor = ThreadPoolExecutor(
+            max_workers=os.cpu_count() or 1,
+            thread_name_prefix="password-hash",
+        )
+    return _password_executor
+
 
 # Pydantic Models
 class Token(BaseModel):
@@ -34,11 +78,16 @@ class TokenData(BaseModel):
     clearance_level: Optional[Literal['L1', 'L2', 'L3']] = None
 
 
-class User(BaseModel):
-    """User model for authentication."""
+@dataclass(frozen=True, slots=True)
+class UserInternal:
+    """
+    Lightweight user record used on the authenticated request path.
+    
+    Avoids Pydantic validation per request.
+    """
     username: str
     email: str
-    clearance_level: Literal['L1', 'L2', 'L3']
+    clearance_level: str
     is_active: bool = True
 
 
@@ -59,19 +108,18 @@ def create_access_token(
     """
     to_encode = data.copy()
     
+    now = int(time.time())
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + int(expires_delta.total_seconds())
     else:
-        expire = datetime.utcnow() + timedelta(
-            minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES
-        )
+        expire = now + _JWT_TTL_SECONDS
     
-    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
+    to_encode.update({"exp": expire, "iat": now})
     
-    encoded_jwt = jwt.encode(
-        to_encode,
-        settings.JWT_SECRET_KEY,
-        algorithm=settings.JWT_ALGORITHM
+    encoded_jwt = _jws.encode(
+        orjson.dumps(to_encode),
+        _JWT_KEY,
+        algorithm=_JWT_ALGORITHM
     )
     
     return encoded_jwt
@@ -81,6 +129,10 @@ def verify_token(token: str) -> dict:
     """
     Verify and decode a JWT token.
     
+    Successfully decoded payloads are cached for up to TOKEN_CACHE_TTL_SECONDS
+    (never past the token's own expiry), so repeated requests with the same
+    token skip signature verification.
+    
     Args:
         token: JWT token string
         
@@ -90,25 +142,48 @@ def verify_token(token: str) -> dict:
     Raises:
         HTTPException: If token is invalid or expired
     """
+    now = time.time()
+    cached = _token_cache.get(token)
+    if cached is not None:
+        expires_at, payload = cached
+        if now < expires_at:
+            _token_cache.move_to_end(token)
+            return payload
+        del _token_cache[token]
+    
     try:
-        payload = jwt.decode(
+        payload = orjson.loads(_jws.decode(
             token,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM]
-        )
-        return payload
-    except JWTError as e:
+            _JWT_KEY,
+            algorithms=_JWT_ALGORITHMS
+        ))
+        if not isinstance(payload, dict):
+            raise jwt.DecodeError("Token payload must be a JSON object")
+        exp = payload.get("exp")
+        if exp is not None and (not isinstance(exp, (int, float)) or exp <= now):
+            raise jwt.ExpiredSignatureError("Signature has expired")
+    except (jwt.InvalidTokenError, orjson.JSONDecodeError) as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         ) from e
+    
+    expires_at = now + TOKEN_CACHE_TTL_SECONDS
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        expires_at = min(expires_at, exp)
+    _token_cache[token] = (expires_at, payload)
+    if len(_token_cache) > TOKEN_CACHE_MAX_SIZE:
+        _token_cache.popitem(last=False)
+    
+    return payload
 
 
 # Password Hashing Functions
 def get_password_hash(password: str) -> str:
     """
-    Hash a password using bcrypt.
+    Hash a password using argon2id.
     
     Args:
         password: Plain text password
@@ -119,33 +194,87 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def verify_password(plain_password: str, hashed_password: Union[str, bytes]) -> bool:
     """
     Verify a plain password against a hashed password.
     
     Args:
         plain_password: Plain text password
-        hashed_password: Hashed password to verify against
+        hashed_password: Hashed password to verify against (bytes avoids re-encoding)
         
     Returns:
         True if password matches, False otherwise
     """
-    # Fixed: Use direct bcrypt to avoid passlib compatibility issues
-    import bcrypt
+    if isinstance(hashed_password, str):
+        hashed_password = hashed_password.encode('utf-8')
     try:
-        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
-    except Exception:
-        # Fallback to passlib if direct bcrypt fails
-        try:
-            return pwd_context.verify(plain_password, hashed_password)
-        except:
-            return False
+        if hashed_password.startswith(b"$2"):
+            # Fixed: Use direct bcrypt to avoid passlib compatibility issues
+            return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password)
+        return pwd_context.verify(plain_password, hashed_password.decode('utf-8'))
+    except ValueError:
+        # Malformed or unrecognized hash
+        return False
+
+
+def password_needs_rehash(hashed_password: Union[str, bytes]) -> bool:
+    """
+    Check whether a stored hash uses a deprecated scheme or outdated parameters.
+    
+    Args:
+        hashed_password: Stored password hash
+        
+    Returns:
+        True if the password should be re-hashed with the current scheme
+    """
+    if isinstance(hashed_password, bytes):
+        hashed_password = hashed_password.decode('utf-8')
+    if hashed_password.startswith("$2"):
+        return True
+    try:
+        return pwd_context.needs_update(hashed_password)
+    except ValueError:
+        return True
+
+
+async def averify_password(plain_password: str, hashed_password: Union[str, bytes]) -> bool:
+    """
+    Verify a password on the password hashing thread pool.
+    
+    bcrypt verification takes hundreds of milliseconds, so it must not run
+    on the event loop.
+    
+    Args:
+        plain_password: Plain text password
+        hashed_password: Hashed password to verify against
+        
+    Returns:
+        True if password matches, False otherwise
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_password_executor(), verify_password, plain_password, hashed_password
+    )
+
+
+async def aget_password_hash(password: str) -> str:
+    """
+    Hash a password on the password hashing thread pool.
+    
+    Args:
+        password: Plain text password
+        
+    Returns:
+        Hashed password string
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_password_executor(), get_password_hash, password)
 
 
 # FastAPI Dependency for Protected Routes
 async def get_current_active_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> User:
+) -> UserInternal:
     """
     FastAPI dependency to get the current authenticated user from JWT token.
     
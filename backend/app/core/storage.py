@@ -4,7 +4,7 @@ MinIO client initialization and bucket management.
 """
 
 import logging
-from typing import Optional
+from typing import Optional, Set
 
 from minio import Minio
 from minio.error import S3Error
@@ -16,6 +16,9 @@ logger = logging.getLogger(__name__)
 # Global MinIO client instance
 _minio_client: Optional[Minio] = None
 
+# Buckets confirmed to exist in this process (existence is stable once created)
+_known_buckets: Set[str] = set()
+
 
 def get_minio_client() -> Minio:
     """
@@ -31,18 +34,18 @@ def get_minio_client() -> Minio:
     
     if _minio_client is None:
         try:
-            # Parse endpoint (host:port)
-            endpoint_parts = settings.MINIO_ENDPOINT.split(":")
-            host = endpoint_parts[0]
-            port = int(endpoint_parts[1]) if len(endpoint_parts) > 1 else (443 if settings.MINIO_SECURE else 9000)
+            # MinIO accepts host:port directly; only add a default port when none is given
+            endpoint = settings.MINIO_ENDPOINT
+            if ":" not in endpoint:
+                endpoint = f"{endpoint}:{443 if settings.MINIO_SECURE else 9000}"
             
             _minio_client = Minio(
-                endpoint=f"{host}:{port}",
+                endpoint=endpoint,
                 access_key=settings.MINIO_ACCESS_KEY,
                 secret_key=settings.MINIO_SECRET_KEY,
                 secure=settings.MINIO_SECURE,
             )
-            logger.info(f"MinIO client initialized: {host}:{port}")
+            logger.info(f"MinIO client initialized: {endpoint}")
         except Exception as e:
             raise RuntimeError(f"Failed to initialize MinIO client: {e}") from e
     
@@ -63,6 +66,9 @@ def ensure_minio_bucket(bucket_name: Optional[str] = None) -> None:
     if bucket_name is None:
         bucket_name = settings.MINIO_BUCKET_NAME
     
+    if bucket_name in _known_buckets:
+        return
+    
     client = get_minio_client()
     
     try:
@@ -73,6 +79,7 @@ def ensure_minio_bucket(bucket_name: Optional[str] = None) -> None:
             logger.info(f"✅ Created MinIO bucket: {bucket_name}")
         else:
             logger.info(f"✅ MinIO bucket exists: {bucket_name}")
+        _known_buckets.add(bucket_name)
     except S3Error as e:
         error_msg = f"MinIO S3 error: {str(e)}"
         logger.error(error_msg)
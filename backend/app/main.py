@@ -3,63 +3,85 @@ Suraksh Backend API - Main Entry Point
 FastAPI application with strict typing and Zero Trust security patterns.
 """
 
+import asyncio
+import importlib
+import json
+import sys
+import time
+import traceback
 from contextlib import asynccontextmanager
 from typing import Any, AsyncGenerator
 
+import orjson
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.exceptions import RequestValidationError
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.config import settings
+from app.core.debug_log import AGENT_LOG_ENABLED, log_event, start_debug_log_writer, stop_debug_log_writer
 
 
 # Request logging middleware
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+# Fixed: Pure ASGI middleware (BaseHTTPMiddleware adds a task and Request/Response wrappers per request)
+class RequestLoggingMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        path = scope["path"]
         # #region agent log
-        import json
-        try:
-            with open(r'd:\Hacakathons\Suraksh\.cursor\debug.log', 'a') as f:
-                f.write(json.dumps({"location":"main.py:RequestLoggingMiddleware","message":"Incoming request","data":{"method":request.method,"path":str(request.url.path),"origin":request.headers.get("origin"),"host":request.headers.get("host")},"timestamp":int(__import__('time').time()*1000),"sessionId":"debug-session","runId":"run1","hypothesisId":"A,C"}) + '\n')
-        except: pass
+        if AGENT_LOG_ENABLED:
+            headers = dict(scope["headers"])
+            origin = headers.get(b"origin")
+            host = headers.get(b"host")
+            log_event({"location":"main.py:RequestLoggingMiddleware","message":"Incoming request","data":{"method":scope["method"],"path":path,"origin":origin.decode("latin-1") if origin else None,"host":host.decode("latin-1") if host else None},"timestamp":time.time_ns() // 1_000_000,"sessionId":"debug-session","runId":"run1","hypothesisId":"A,C"})
         # #endregion
-        response = await call_next(request)
+        status_code = 0
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        await self.app(scope, receive, send_wrapper)
         # #region agent log
-        try:
-            with open(r'd:\Hacakathons\Suraksh\.cursor\debug.log', 'a') as f:
-                f.write(json.dumps({"location":"main.py:RequestLoggingMiddleware","message":"Request completed","data":{"status":response.status_code,"path":str(request.url.path)},"timestamp":int(__import__('time').time()*1000),"sessionId":"debug-session","runId":"run1","hypothesisId":"A,C"}) + '\n')
-        except: pass
+        if AGENT_LOG_ENABLED:
+            log_event({"location":"main.py:RequestLoggingMiddleware","message":"Request completed","data":{"status":status_code,"path":path},"timestamp":time.time_ns() // 1_000_000,"sessionId":"debug-session","runId":"run1","hypothesisId":"A,C"})
         # #endregion
-        return response
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    """
-    Application lifespan manager.
-    Handles startup and shutdown events.
-    """
-    # Startup
-    print("[STARTUP] Suraksh Backend API starting up...")
-    
-    # Initialize Neo4j connection (Phase 2 - optional for Phase 1)
+async def _init_neo4j(app: FastAPI) -> None:
+    """Initialize and verify Neo4j (Phase 2 - optional for Phase 1)."""
     try:
         from app.core.database import get_neo4j_driver, verify_neo4j_connection
         driver = get_neo4j_driver()
+        # Share the pooled driver with request handlers
+        app.state.neo4j_driver = driver
         if await verify_neo4j_connection():
             print("[OK] Neo4j connection verified")
+            # Document-scoped exports seek on the shared entity label; label older nodes too
+            from app.services.graph_rag.ingestion import ensure_entity_schema
+            async with driver.session() as session:
+                await ensure_entity_schema(session)
         else:
             print("[WARN] Neo4j connection verification failed")
     except Exception as e:
         print(f"[WARN] Failed to initialize Neo4j: {e}")
         print("   Graph operations may fail until Neo4j is available")
-    
-    # Initialize Qdrant connection (Phase 2 - optional for Phase 1)
+
+
+async def _init_qdrant() -> None:
+    """Initialize and verify Qdrant (Phase 2 - optional for Phase 1)."""
     try:
-        from app.core.database import get_qdrant_client, ensure_qdrant_collection, verify_qdrant_connection
-        client = get_qdrant_client()
+        from app.core.database import ensure_qdrant_collection, verify_qdrant_connection
         await ensure_qdrant_collection()
         if await verify_qdrant_connection():
             print("[OK] Qdrant connection verified")
@@ -68,19 +90,39 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     except Exception as e:
         print(f"[WARN] Failed to initialize Qdrant: {e}")
         print("   Vector search may fail until Qdrant is available")
-    
-    # Initialize MinIO connection
+
+
+async def _init_minio() -> None:
+    """Initialize and verify MinIO (synchronous client, run in a worker thread)."""
     try:
-        from app.core.storage import get_minio_client, ensure_minio_bucket, verify_minio_connection
-        client = get_minio_client()
-        ensure_minio_bucket()  # Synchronous function
-        if verify_minio_connection():  # Synchronous function
+        from app.core.storage import ensure_minio_bucket, verify_minio_connection
+        await asyncio.to_thread(ensure_minio_bucket)
+        if await asyncio.to_thread(verify_minio_connection):
             print("[OK] MinIO connection verified")
         else:
             print("[WARN] MinIO connection verification failed")
     except Exception as e:
         print(f"[WARN] Failed to initialize MinIO: {e}")
         print("   File storage may fail until MinIO is available")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    """
+    Application lifespan manager.
+    Handles startup and shutdown events.
+    """
+    # Startup
+    print("[STARTUP] Suraksh Backend API starting up...")
+    start_debug_log_writer()
+    
+    # Initialize backends concurrently so startup waits for the slowest, not the sum
+    await asyncio.gather(
+        _init_neo4j(app),
+        _init_qdrant(),
+        _init_minio(),
+        return_exceptions=True,
+    )
     
     yield
     
@@ -94,6 +136,22 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         print("[OK] Neo4j connection closed")
     except Exception as e:
         print(f"[WARN] Error closing Neo4j connection: {e}")
+    
+    try:
+        from app.core.database import close_qdrant_client
+        await close_qdrant_client()
+        print("[OK] Qdrant connection closed")
+    except Exception as e:
+        print(f"[WARN] Error closing Qdrant connection: {e}")
+    
+    # Close the LLM HTTP pool on the loop that owns its connections
+    try:
+        from app.core.llm_factory import close_llm
+        await close_llm()
+    except Exception as e:
+        print(f"[WARN] Error closing LLM client: {e}")
+    
+    await stop_debug_log_writer()
 
 
 # Initialize FastAPI app
@@ -105,22 +163,25 @@ app = FastAPI(
     redoc_url="/api/redoc",
     openapi_url="/api/openapi.json",
     lifespan=lifespan,
+    # orjson serializes 2-5x faster than stdlib json and writes bytes directly
+    default_response_class=ORJSONResponse,
 )
 
 # Add request logging middleware
 app.add_middleware(RequestLoggingMiddleware)
 
+# Compress larger JSON responses (added before CORS so CORS headers wrap the compressed response)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # CORS Middleware (configure for production)
+_CORS_ORIGINS = tuple(settings.CORS_ORIGINS)
 # #region agent log
-import json
-try:
-    with open(r'd:\Hacakathons\Suraksh\.cursor\debug.log', 'a') as f:
-        f.write(json.dumps({"location":"main.py:55","message":"CORS middleware setup","data":{"corsOrigins":settings.CORS_ORIGINS},"timestamp":int(__import__('time').time()*1000),"sessionId":"debug-session","runId":"run1","hypothesisId":"C"}) + '\n')
-except: pass
+if AGENT_LOG_ENABLED:
+    log_event({"location":"main.py:55","message":"CORS middleware setup","data":{"corsOrigins":_CORS_ORIGINS},"timestamp":time.time_ns() // 1_000_000,"sessionId":"debug-session","runId":"run1","hypothesisId":"C"})
 # #endregion
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS,
+    allow_origins=_CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -141,11 +202,8 @@ async def root() -> dict[str, str]:
 async def health_check() -> dict[str, str]:
     """Detailed health check endpoint."""
     # #region agent log
-    import json
-    try:
-        with open(r'd:\Hacakathons\Suraksh\.cursor\debug.log', 'a') as f:
-            f.write(json.dumps({"location":"main.py:75","message":"Health check endpoint called","data":{},"timestamp":int(__import__('time').time()*1000),"sessionId":"debug-session","runId":"run1","hypothesisId":"A"}) + '\n')
-    except: pass
+    if AGENT_LOG_ENABLED:
+        log_event({"location":"main.py:75","message":"Health check endpoint called","data":{},"timestamp":time.time_ns() // 1_000_000,"sessionId":"debug-session","runId":"run1","hypothesisId":"A"})
     # #endregion
     return {
         "status": "healthy",
@@ -178,32 +236,30 @@ async def api_v1_root() -> dict[str, Any]:
 
 
 @app.exception_handler(RequestValidationError)
-async def validation_exception_handler(request: Request, exc: RequestValidationError) -> JSONResponse:
+async def validation_exception_handler(request: Request, exc: RequestValidationError) -> Response:
     """Handle request validation errors with detailed messages."""
     # #region agent log
-    import json
-    try:
-        # Try to read the request body for debugging
+    if AGENT_LOG_ENABLED:
+        # Try to read the request body for debugging (debug builds only; bodies can be large)
         body = None
-        try:
-            body_bytes = await request.body()
-            if body_bytes:
-                import json as json_lib
-                try:
-                    body = json_lib.loads(body_bytes)
-                except:
-                    body = body_bytes.decode('utf-8', errors='ignore')
-        except:
-            pass
+        if settings.DEBUG:
+            try:
+                body_bytes = await request.body()
+                if body_bytes:
+                    try:
+                        body = json.loads(body_bytes)
+                    except ValueError:
+                        body = body_bytes.decode('utf-8', errors='ignore')
+            except Exception:
+                pass
         
-        with open(r'd:\Hacakathons\Suraksh\.cursor\debug.log', 'a') as f:
-            f.write(json.dumps({"location":"main.py:validation_exception_handler","message":"Request validation error","data":{"errors":exc.errors(),"body":body,"path":str(request.url.path),"method":request.method},"timestamp":int(__import__('time').time()*1000),"sessionId":"debug-session","runId":"run1","hypothesisId":"A"}) + '\n')
-    except: pass
+        log_event({"location":"main.py:validation_exception_handler","message":"Request validation error","data":{"errors":exc.errors(),"body":body,"path":str(request.url.path),"method":request.method},"timestamp":time.time_ns() // 1_000_000,"sessionId":"debug-session","runId":"run1","hypothesisId":"A"})
     # #endregion
     # Fixed: Return 400 for validation errors (client error) instead of 422
     # Extract first error message for clarity
+    errors = exc.errors()
     error_messages = []
-    for error in exc.errors():
+    for error in errors:
         field = ".".join(str(loc) for loc in error.get("loc", []))
         msg = error.get("msg", "Validation error")
         error_messages.append(f"{field}: {msg}" if field else msg)
@@ -211,27 +267,28 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     # Log to console for immediate debugging
     print(f"[VALIDATION ERROR] Path: {request.url.path}, Errors: {error_messages}")
     
-    return JSONResponse(
+    content = {
+        "error": "Validation error",
+        "detail": error_messages[0] if error_messages else "Invalid request data",
+        "errors": errors,
+    }
+    
+    # orjson directly; default=str covers exception objects in the errors' "ctx"
+    return Response(
+        content=orjson.dumps(content, default=str),
         status_code=400,
-        content={
-            "error": "Validation error",
-            "detail": error_messages[0] if error_messages else "Invalid request data",
-            "errors": exc.errors(),
-        },
+        media_type="application/json",
     )
 
 
 @app.exception_handler(Exception)
-async def global_exception_handler(request, exc: Exception) -> JSONResponse:
+async def global_exception_handler(request, exc: Exception) -> ORJSONResponse:
     """Global exception handler for unhandled errors."""
     # #region agent log
-    import json
-    try:
-        with open(r'd:\Hacakathons\Suraksh\.cursor\debug.log', 'a') as f:
-            f.write(json.dumps({"location":"main.py:84","message":"Global exception handler","data":{"error":str(exc),"path":str(request.url) if hasattr(request,'url') else None},"timestamp":int(__import__('time').time()*1000),"sessionId":"debug-session","runId":"run1","hypothesisId":"A"}) + '\n')
-    except: pass
+    if AGENT_LOG_ENABLED:
+        log_event({"location":"main.py:84","message":"Global exception handler","data":{"error":str(exc),"path":str(request.url) if hasattr(request,'url') else None},"timestamp":time.time_ns() // 1_000_000,"sessionId":"debug-session","runId":"run1","hypothesisId":"A"})
     # #endregion
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal server error",
@@ -252,60 +309,55 @@ app.include_router(vault.router, prefix="/api/v1/vault", tags=["Vault"])
 
 # Include optional routers (may fail if graph_rag dependencies are missing)
 # Fixed: Catch all exceptions, not just ImportError, to ensure router registration
-ingest_router_registered = False
-search_router_registered = False
+# (module path, URL prefix, tag)
+OPTIONAL_ROUTERS = (
+    ("app.api.v1.endpoints.ingest", "/api/v1/ingest", "Ingest"),
+    ("app.api.v1.endpoints.search", "/api/v1/search", "Search"),
+    ("app.api.v1.endpoints.deepsearch", "/api/v1/deepsearch", "DeepSearch-RAG-Sentinel"),
+)
+routers_registered = {"Authentication": True, "Vault": True}
 
-# Fixed: Always register ingest router, even if import fails
-# This ensures the endpoint exists and returns proper error messages instead of 404
-# #region agent log
-import json
-try:
-    with open(r'd:\Hacakathons\Suraksh\.cursor\debug.log', 'a') as f:
-        f.write(json.dumps({"location":"main.py:ingest_router_registration","message":"Starting ingest router registration","data":{},"timestamp":int(__import__('time').time()*1000),"sessionId":"debug-session","runId":"run1","hypothesisId":"A,B,C"}) + '\n')
-except: pass
-# #endregion
-try:
-    from app.api.v1.endpoints import ingest
+for module_path, prefix, tag in OPTIONAL_ROUTERS:
+    routers_registered[tag] = False
     # #region agent log
-    try:
-        with open(r'd:\Hacakathons\Suraksh\.cursor\debug.log', 'a') as f:
-            f.write(json.dumps({"location":"main.py:ingest_router_registration","message":"Ingest module imported successfully","data":{"router_exists":hasattr(ingest,'router'),"router_routes_count":len(ingest.router.routes) if hasattr(ingest,'router') else 0},"timestamp":int(__import__('time').time()*1000),"sessionId":"debug-session","runId":"run1","hypothesisId":"B"}) + '\n')
-    except: pass
+    if AGENT_LOG_ENABLED:
+        log_event({"location":"main.py:router_registration","message":"Starting router registration","data":{"module":module_path},"timestamp":time.time_ns() // 1_000_000,"sessionId":"debug-session","runId":"run1","hypothesisId":"A,B,C"})
     # #endregion
     try:
-        app.include_router(ingest.router, prefix="/api/v1/ingest", tags=["Ingest"])
-        ingest_router_registered = True
-        print("[OK] Ingest router registered successfully")
+        module = importlib.import_module(module_path)
+    except Exception as e:
+        print(f"[WARN] Failed to import {tag} endpoints: {e}")
+        print(f"   {tag} endpoints will not be available")
         # #region agent log
-        try:
-            with open(r'd:\Hacakathons\Suraksh\.cursor\debug.log', 'a') as f:
-                f.write(json.dumps({"location":"main.py:ingest_router_registration","message":"Ingest router registered successfully","data":{"registered":True,"app_routes_count":len([r for r in app.routes if hasattr(r,'path')])},"timestamp":int(__import__('time').time()*1000),"sessionId":"debug-session","runId":"run1","hypothesisId":"B"}) + '\n')
-        except: pass
+        if AGENT_LOG_ENABLED:
+            log_event({"location":"main.py:router_registration","message":"Failed to import router module","data":{"module":module_path,"error":str(e),"error_type":type(e).__name__},"timestamp":time.time_ns() // 1_000_000,"sessionId":"debug-session","runId":"run1","hypothesisId":"B"})
+        # #endregion
+        if settings.DEBUG:
+            traceback.print_exc()
+        continue
+    
+    try:
+        app.include_router(module.router, prefix=prefix, tags=[tag])
+        routers_registered[tag] = True
+        print(f"[OK] {tag} router registered successfully")
+        # #region agent log
+        if AGENT_LOG_ENABLED:
+            log_event({"location":"main.py:router_registration","message":"Router registered successfully","data":{"module":module_path,"router_routes_count":len(module.router.routes)},"timestamp":time.time_ns() // 1_000_000,"sessionId":"debug-session","runId":"run1","hypothesisId":"B"})
         # #endregion
     except Exception as e:
-        print(f"[WARN] Failed to register ingest router: {e}")
-        print("   Ingest endpoints will not be available")
+        print(f"[WARN] Failed to register {tag} router: {e}")
+        print(f"   {tag} endpoints will not be available")
         # #region agent log
-        try:
-            with open(r'd:\Hacakathons\Suraksh\.cursor\debug.log', 'a') as f:
-                f.write(json.dumps({"location":"main.py:ingest_router_registration","message":"Failed to register ingest router","data":{"error":str(e),"error_type":type(e).__name__},"timestamp":int(__import__('time').time()*1000),"sessionId":"debug-session","runId":"run1","hypothesisId":"B,C"}) + '\n')
-        except: pass
+        if AGENT_LOG_ENABLED:
+            log_event({"location":"main.py:router_registration","message":"Failed to register router","data":{"module":module_path,"error":str(e),"error_type":type(e).__name__},"timestamp":time.time_ns() // 1_000_000,"sessionId":"debug-session","runId":"run1","hypothesisId":"B,C"})
         # #endregion
-        import traceback
         if settings.DEBUG:
             traceback.print_exc()
-except Exception as e:
-    print(f"[WARN] Failed to import ingest endpoints: {e}")
+
+# Fixed: Always register ingest router, even if import fails
+# This ensures the endpoint exists and returns proper error messages instead of 404
+if not routers_registered["Ingest"]:
     print("   Creating fallback ingest router to prevent 404 errors")
-    # #region agent log
-    try:
-        with open(r'd:\Hacakathons\Suraksh\.cursor\debug.log', 'a') as f:
-            f.write(json.dumps({"location":"main.py:ingest_router_registration","message":"Failed to import ingest module","data":{"error":str(e),"error_type":type(e).__name__},"timestamp":int(__import__('time').time()*1000),"sessionId":"debug-session","runId":"run1","hypothesisId":"B"}) + '\n')
-    except: pass
-    # #endregion
-    import traceback
-    if settings.DEBUG:
-        traceback.print_exc()
     
     # Fixed: Create a minimal fallback router so the endpoint exists
     from fastapi import APIRouter, Depends, HTTPException, status
@@ -340,86 +392,45 @@ except Exception as e:
         )
     
     app.include_router(fallback_ingest_router, prefix="/api/v1/ingest", tags=["Ingest"])
-    ingest_router_registered = True
+    routers_registered["Ingest"] = True
     print("[OK] Fallback ingest router registered (service unavailable)")
 
-# Register search router
-try:
-    from app.api.v1.endpoints import search
-    try:
-        app.include_router(search.router, prefix="/api/v1/search", tags=["Search"])
-        search_router_registered = True
-        print("[OK] Search router registered successfully")
-    except Exception as e:
-        print(f"[WARN] Failed to register search router: {e}")
-        print("   Search endpoints will not be available")
-        import traceback
-        if settings.DEBUG:
-            traceback.print_exc()
-except Exception as e:
-    print(f"[WARN] Failed to import search endpoints: {e}")
-    print("   Search endpoints will not be available")
-    import traceback
-    if settings.DEBUG:
-        traceback.print_exc()
-
-# Register DeepSearch-RAG-Sentinel router
-deepsearch_router_registered = False
-try:
-    from app.api.v1.endpoints import deepsearch
-    try:
-        app.include_router(deepsearch.router, prefix="/api/v1/deepsearch", tags=["DeepSearch-RAG-Sentinel"])
-        deepsearch_router_registered = True
-        print("[OK] DeepSearch-RAG-Sentinel router registered successfully")
-    except Exception as e:
-        print(f"[WARN] Failed to register DeepSearch router: {e}")
-        print("   DeepSearch endpoints will not be available")
-        import traceback
-        if settings.DEBUG:
-            traceback.print_exc()
-except Exception as e:
-    print(f"[WARN] Failed to import DeepSearch endpoints: {e}")
-    print("   DeepSearch endpoints will not be available")
-    import traceback
-    if settings.DEBUG:
-        traceback.print_exc()
+ingest_router_registered = routers_registered["Ingest"]
+INGEST_PREFIX = "/api/v1/ingest"
+
+# Classify routes once; the route table doesn't change after registration
+_INGEST_ROUTES = tuple(r for r in app.routes if getattr(r, 'path', '').startswith(INGEST_PREFIX))
 
 # Log router registration status
 print("[INFO] Router registration status:")
-print(f"   - Auth: [OK]")
-print(f"   - Vault: [OK]")
-print(f"   - Ingest: {'[OK]' if ingest_router_registered else '[FAIL]'}")
-print(f"   - Search: {'[OK]' if search_router_registered else '[FAIL]'}")
-print(f"   - DeepSearch-RAG-Sentinel: {'[OK]' if deepsearch_router_registered else '[FAIL]'}")
+for tag, registered in routers_registered.items():
+    print(f"   - {tag}: {'[OK]' if registered else '[FAIL]'}")
 
 # Fixed: Verify ingest routes are accessible
 if ingest_router_registered:
-    ingest_routes = [r for r in app.routes if hasattr(r, 'path') and '/ingest' in r.path]
-    print(f"[INFO] Ingest routes registered: {len(ingest_routes)}")
-    for route in ingest_routes:
-        methods = list(route.methods) if hasattr(route, 'methods') and route.methods else []
+    print(f"[INFO] Ingest routes registered: {len(_INGEST_ROUTES)}")
+    for route in _INGEST_ROUTES:
+        methods = list(getattr(route, 'methods', None) or ())
         print(f"   - {route.path} {methods}")
     # #region agent log
-    try:
-        with open(r'd:\Hacakathons\Suraksh\.cursor\debug.log', 'a') as f:
-            f.write(json.dumps({"location":"main.py:route_verification","message":"Ingest routes verification","data":{"ingest_routes_count":len(ingest_routes),"routes":[{"path":r.path,"methods":list(r.methods) if hasattr(r,'methods') and r.methods else []} for r in ingest_routes]},"timestamp":int(__import__('time').time()*1000),"sessionId":"debug-session","runId":"run1","hypothesisId":"A,B"}) + '\n')
-    except: pass
+    if AGENT_LOG_ENABLED:
+        log_event({"location":"main.py:route_verification","message":"Ingest routes verification","data":{"ingest_routes_count":len(_INGEST_ROUTES),"routes":[{"path":r.path,"methods":list(getattr(r,'methods',None) or ())} for r in _INGEST_ROUTES]},"timestamp":time.time_ns() // 1_000_000,"sessionId":"debug-session","runId":"run1","hypothesisId":"A,B"})
     # #endregion
 
-# Fixed: Add diagnostic endpoint to list all registered routes
-@app.get("/api/debug/routes", tags=["Debug"])
-async def list_routes() -> dict:
-    """List all registered routes for debugging."""
+def _build_routes_listing() -> dict:
+    """Build the registered-routes listing served by /api/debug/routes."""
     routes = []
     for route in app.routes:
-        if hasattr(route, "path") and hasattr(route, "methods"):
-            routes.append({
-                "path": route.path,
-                "methods": list(route.methods) if route.methods else [],
-                "name": getattr(route, "name", "unknown")
-            })
+        path = getattr(route, "path", None)
+        if path is None:
+            continue
+        routes.append({
+            "path": path,
+            "methods": list(getattr(route, "methods", None) or ()),
+            "name": getattr(route, "name", "unknown")
+        })
     # Filter for ingest routes specifically
-    ingest_routes = [r for r in routes if "/ingest" in r["path"]]
+    ingest_routes = [r for r in routes if r["path"].startswith(INGEST_PREFIX)]
     return {
         "total_routes": len(routes),
         "ingest_routes": ingest_routes,
@@ -427,18 +438,30 @@ async def list_routes() -> dict:
     }
 
 
+# Fixed: Add diagnostic endpoint to list all registered routes
+@app.get("/api/debug/routes", tags=["Debug"])
+async def list_routes() -> Response:
+    """List all registered routes for debugging."""
+    return Response(content=_ROUTES_PAYLOAD, media_type="application/json")
+
+
+# The route table is fixed once all routers are included, so encode the listing once
+_ROUTES_PAYLOAD = orjson.dumps(_build_routes_listing())
+
+
 if __name__ == "__main__":
     import uvicorn
     # #region agent log
-    try:
-        with open(r'd:\Hacakathons\Suraksh\.cursor\debug.log', 'a') as f:
-            f.write(json.dumps({"location":"main.py:server_start","message":"Starting uvicorn server","data":{"host":"0.0.0.0","port":8000,"reload":settings.DEBUG},"timestamp":int(__import__('time').time()*1000),"sessionId":"debug-session","runId":"run1","hypothesisId":"A"}) + '\n')
-    except: pass
+    if AGENT_LOG_ENABLED:
+        log_event({"location":"main.py:server_start","message":"Starting uvicorn server","data":{"host":"0.0.0.0","port":8000,"reload":settings.DEBUG},"timestamp":time.time_ns() // 1_000_000,"sessionId":"debug-session","runId":"run1","hypothesisId":"A"})
     # #endregion
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8000,
         reload=settings.DEBUG,
+        # uvloop is not available on Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
     )
 
@@ -4,15 +4,61 @@ Provides RAG capabilities with citations using OpenRouter API.
 """
 
 import logging
+import mimetypes
+import os
 import re
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# LLM settings read once at import rather than per request
+_LLM_TEMPERATURE = settings.LLM_TEMPERATURE
+_LLM_MODEL_DEFAULT = settings.LLM_MODEL or "deepseek/deepseek-r1-0528:free"
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# MIME types for the document formats we expect; mimetypes covers the rest
+MIME_TYPES_BY_EXTENSION = {
+    ".pdf": "application/pdf",
+    ".txt": "text/plain",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+# Citation marker: [Source: filename, Page X]
+CITATION_PATTERN = re.compile(r'\[Source:\s*([^,]+),\s*Page\s*(\d+)\]', re.IGNORECASE)
+
+
+@lru_cache(maxsize=4)
+def _get_openai_client(api_key: str, base_url: str, referer: str, title: str) -> AsyncOpenAI:
+    """
+    Get a shared async OpenAI client for the given credentials and endpoint.
+    
+    Clients are cached so every service instance reuses one connection pool
+    instead of opening its own.
+    
+    Args:
+        api_key: OpenRouter API key
+        base_url: API base URL
+        referer: HTTP-Referer header sent to OpenRouter
+        title: X-Title header sent to OpenRouter
+        
+    Returns:
+        AsyncOpenAI client instance
+    """
+    headers = {"HTTP-Referer": referer, "X-Title": title} if base_url == OPENROUTER_BASE_URL else None
+    return AsyncOpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        default_headers=headers,
+        max_retries=2,
+        timeout=60.0,
+    )
+
 
 class GeminiFileSearchService:
     """
@@ -37,17 +83,17 @@ class GeminiFileSearchService:
             )
         
         # Configure OpenAI client for OpenRouter
-        base_url = settings.OPENROUTER_BASE_URL or "https://openrouter.ai/api/v1"
-        self.client = OpenAI(
-            api_key=self.api_key,
-            base_url=base_url,
-            default_headers={
-                "HTTP-Referer": settings.OPENROUTER_HTTP_REFERER or "https://suraksh.local",
-                "X-Title": settings.OPENROUTER_SITE_NAME or "Suraksh Portal",
-            } if base_url == "https://openrouter.ai/api/v1" else None,
+        base_url = settings.OPENROUTER_BASE_URL or OPENROUTER_BASE_URL
+        # Fixed: Async client so LLM round-trips don't block the event loop
+        # Fixed: Shared per (key, endpoint) so instances don't each open a connection pool
+        self.client = _get_openai_client(
+            self.api_key,
+            base_url,
+            settings.OPENROUTER_HTTP_REFERER or "https://suraksh.local",
+            settings.OPENROUTER_SITE_NAME or "Suraksh Portal",
         )
         
-        self.model = settings.LLM_MODEL or "deepseek/deepseek-r1-0528:free"
+        self.model = _LLM_MODEL_DEFAULT
         self.store_id = store_id  # Kept for compatibility
     
     def get_or_create_store(self) -> str:
@@ -96,14 +142,11 @@ class GeminiFileSearchService:
         
         # Auto-detect MIME type if not provided
         if not mime_type:
-            if filename.lower().endswith('.pdf'):
-                mime_type = 'application/pdf'
-            elif filename.lower().endswith('.txt'):
-                mime_type = 'text/plain'
-            elif filename.lower().endswith('.docx'):
-                mime_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-            else:
-                mime_type = 'application/octet-stream'
+            mime_type = (
+                MIME_TYPES_BY_EXTENSION.get(os.path.splitext(filename)[1].lower())
+                or mimetypes.guess_type(filename)[0]
+                or 'application/octet-stream'
+            )
         
         return {
             "file_id": f"vault_{filename}",
@@ -139,7 +182,7 @@ class GeminiFileSearchService:
             """
             
             # Generate content using OpenRouter
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {
@@ -147,7 +190,7 @@ class GeminiFileSearchService:
                         "content": enhanced_query
                     }
                 ],
-                temperature=settings.LLM_TEMPERATURE,
+                temperature=_LLM_TEMPERATURE,
             )
             
             # Extract answer
@@ -177,19 +220,12 @@ class GeminiFileSearchService:
         Returns:
             List of citation dictionaries
         """
-        citations = []
-        
-        # Look for citation patterns in text
-        # Pattern: [Source: filename, Page X] or similar
-        citation_pattern = r'\[Source:\s*([^,]+),\s*Page\s*(\d+)\]'
-        matches = re.finditer(citation_pattern, text, re.IGNORECASE)
-        
-        for match in matches:
-            citations.append({
+        return [
+            {
                 "filename": match.group(1).strip(),
                 "page": int(match.group(2)),
                 "confidence": None,
-            })
-        
-        return citations
+            }
+            for match in CITATION_PATTERN.finditer(text)
+        ]
 
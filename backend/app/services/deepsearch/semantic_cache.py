@@ -0,0 +1,123 @@
+"""
+Semantic Query Cache
+Near-duplicate query cache for DeepSearch answers, matched by cosine
+similarity of query embeddings.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, List, NamedTuple, Optional
+
+import numpy as np
+
+from app.core.embeddings import EMBEDDING_DIMENSION
+
+
+class _CacheEntry(NamedTuple):
+    """A cached answer and when it stops being served."""
+    query: str
+    value: Any
+    expires_at: float
+
+
+class SemanticQueryCache:
+    """
+    LRU + TTL cache keyed by query embedding.
+    
+    Embeddings are L2-normalized and stored as rows of a preallocated
+    matrix, so a lookup is one matrix-vector product (inner product ==
+    cosine similarity) instead of a scan over Python objects.
+    """
+    
+    def __init__(
+        self,
+        maxsize: int = 512,
+        ttl: float = 300.0,
+        tau: float = 0.85,
+        dimension: int = EMBEDDING_DIMENSION,
+    ):
+        """
+        Initialize semantic query cache.
+        
+        Args:
+            maxsize: Maximum number of cached queries
+            ttl: Seconds a cached answer stays valid
+            tau: Minimum cosine similarity for a cache hit
+            dimension: Embedding dimension
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.tau = tau
+        self._vectors = np.zeros((maxsize, dimension), dtype=np.float32)
+        self._valid = np.zeros(maxsize, dtype=bool)
+        # Row id -> entry, ordered from least to most recently used
+        self._entries: "OrderedDict[int, _CacheEntry]" = OrderedDict()
+        self._free_rows: List[int] = list(range(maxsize - 1, -1, -1))
+    
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> Optional[np.ndarray]:
+        """L2-normalize an embedding, or None for a zero vector (never matches)."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return None
+        return vector / norm
+    
+    def _evict(self, row: int) -> None:
+        """Drop a row from the cache and return it to the free list."""
+        del self._entries[row]
+        self._valid[row] = False
+        self._free_rows.append(row)
+    
+    def get(self, embedding: np.ndarray) -> Optional[Any]:
+        """
+        Look up the answer cached for the most similar query.
+        
+        Args:
+            embedding: Query embedding
+        
+        Returns:
+            Cached value if a live entry is at least tau-similar, else None
+        """
+        if not self._entries:
+            return None
+        vector = self._normalize(embedding)
+        if vector is None:
+            return None
+        
+        scores = self._vectors @ vector
+        scores[~self._valid] = -np.inf
+        row = int(np.argmax(scores))
+        if scores[row] < self.tau:
+            return None
+        
+        entry = self._entries[row]
+        if entry.expires_at <= time.monotonic():
+            self._evict(row)
+            return None
+        
+        self._entries.move_to_end(row)
+        return entry.value
+    
+    def put(self, query: str, embedding: np.ndarray, value: Any) -> None:
+        """
+        Cache a value for a query, evicting the least recently used entry if full.
+        
+        Args:
+            query: Original query text
+            embedding: Query embedding
+            value: Value to cache
+        """
+        if self.maxsize <= 0:
+            return
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+        
+        if not self._free_rows:
+            self._evict(next(iter(self._entries)))
+        row = self._free_rows.pop()
+        
+        self._vectors[row] = vector
+        self._valid[row] = True
+        self._entries[row] = _CacheEntry(query, value, time.monotonic() + self.ttl)
@@ -3,14 +3,42 @@ DeepSearch-RAG-Sentinel Agent
 Hyper-accurate, cited answers using OpenRouter/DeepSeek API with Layout-Aware Parsing.
 """
 
+import asyncio
 import logging
 import re
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
+import numpy as np
+
+from app.core.embeddings import get_embedding_service
 from app.services.deepsearch.file_search_service import GeminiFileSearchService
+from app.services.deepsearch.semantic_cache import SemanticQueryCache
 
 logger = logging.getLogger(__name__)
 
+# Citation formats normalized to [Source: Filename, Page X] / [Source: Filename]
+_CITE_RE_FULL = re.compile(r'\[Source:\s*([^,]+),\s*Page\s*(\d+)\]', re.IGNORECASE)
+_CITE_RE_SHORT = re.compile(r'\[Source:\s*([^\]]+)\]', re.IGNORECASE)
+
+# Connectives that mark a multi-part question worth reformulating
+_COMPLEX_QUERY_CONNECTIVES = (" and ", " or ", " vs ", " vs. ", " versus ")
+
+# Shared across agent instances, since the endpoint builds an agent per request
+_semantic_cache: Optional[SemanticQueryCache] = None
+
+
+def get_semantic_cache() -> SemanticQueryCache:
+    """
+    Get or create the process-wide semantic query cache.
+    
+    Returns:
+        SemanticQueryCache instance
+    """
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticQueryCache(maxsize=512, ttl=300.0, tau=0.85)
+    return _semantic_cache
+
 
 class DeepSearchRAGSentinel:
     """
@@ -27,19 +55,36 @@ class DeepSearchRAGSentinel:
     - Cross-references retrieved chunks to ensure no conflicting data
     """
     
-    def __init__(self, file_search_service: Optional[GeminiFileSearchService] = None):
+    __slots__ = ("_file_search_service", "_cache")
+    
+    def __init__(
+        self,
+        file_search_service: Optional[GeminiFileSearchService] = None,
+        semantic_cache: bool = False,
+    ):
         """
         Initialize DeepSearch-RAG-Sentinel agent.
         
         Args:
-            file_search_service: File Search service instance (OpenRouter/DeepSeek)
+            file_search_service: File Search service instance (OpenRouter/DeepSeek);
+                created on first use if not provided
+            semantic_cache: Serve near-duplicate queries from the shared semantic cache
         """
-        self.file_search_service = file_search_service or GeminiFileSearchService()
+        self._file_search_service = file_search_service
+        self._cache = get_semantic_cache() if semantic_cache else None
+    
+    @property
+    def file_search_service(self) -> GeminiFileSearchService:
+        """File Search service, created lazily so agents that never search don't build one."""
+        if self._file_search_service is None:
+            self._file_search_service = GeminiFileSearchService()
+        return self._file_search_service
     
     async def query(
         self,
         user_query: str,
         top_k: int = 5,
+        reformulate: bool = True,
     ) -> Dict[str, Any]:
         """
         Process a user query and return a hyper-accurate, cited answer.
@@ -54,32 +99,133 @@ class DeepSearchRAGSentinel:
         Args:
             user_query: Natural language query
             top_k: Number of top results to retrieve
+            reformulate: Enrich complex queries before searching (False sends the raw query)
             
         Returns:
             Dictionary with answer, citations, and source summary
         """
+        return (await self.query_batch([user_query], top_k=top_k, reformulate=reformulate))[0]
+    
+    async def query_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        reformulate: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Process several queries, issuing their File Search calls together.
+        
+        Runs the same protocol as query() for each query. The searches go
+        through the service's search_many() when it provides one, otherwise
+        they run concurrently, so N queries cost about one round-trip.
+        
+        Args:
+            queries: Natural language queries
+            top_k: Number of top results to retrieve
+            reformulate: Enrich complex queries before searching (False sends the raw queries)
+            
+        Returns:
+            One result dictionary per query, in input order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+        embeddings: List[Optional[np.ndarray]] = [None] * len(queries)
+        
+        # Near-duplicate queries short-circuit the whole pipeline
+        if self._cache is not None:
+            embeddings = list(await asyncio.gather(*(self._embed_query(q) for q in queries)))
+            for i, (user_query, query_embedding) in enumerate(zip(queries, embeddings)):
+                if query_embedding is None:
+                    continue
+                cached = self._cache.get(query_embedding)
+                if cached is not None and cached[0] == top_k:
+                    logger.info(f"Semantic cache hit for query: {user_query}")
+                    results[i] = {**cached[1], "query": user_query}
+        
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+        
         # Step 1: Query Reformulation
-        reformulated_query = self._reformulate_query(user_query)
-        logger.info(f"Query reformulated: {user_query} -> {reformulated_query}")
+        reformulated_queries = []
+        for i in pending:
+            reformulated_query = self._reformulate_query(queries[i]) if reformulate else queries[i]
+            logger.info(f"Query reformulated: {queries[i]} -> {reformulated_query}")
+            reformulated_queries.append(reformulated_query)
         
         # Step 2: Context Retrieval via File Search
+        search_results = await self._search_many(reformulated_queries, top_k)
+        
+        for i, search_result in zip(pending, search_results):
+            user_query = queries[i]
+            if isinstance(search_result, Exception):
+                logger.error(f"File Search failed: {search_result}")
+                results[i] = {
+                    "query": user_query,
+                    "answer": "The current documentation does not contain this information.",
+                    "citations": [],
+                    "source_summary": [],
+                    "error": str(search_result),
+                }
+                continue
+            
+            result = self._build_result(user_query, search_result)
+            if embeddings[i] is not None:
+                self._cache.put(user_query, embeddings[i], (top_k, result))
+            results[i] = result
+        
+        return results
+    
+    async def _embed_query(self, query: str) -> Optional[np.ndarray]:
+        """Embed a query for the semantic cache, or None if embedding fails."""
         try:
-            search_result = await self.file_search_service.search(
-                query=reformulated_query,
-                top_k=top_k,
-            )
+            return await get_embedding_service().get_embedding(query)
         except Exception as e:
-            logger.error(f"File Search failed: {e}")
-            return {
-                "query": user_query,
-                "answer": "The current documentation does not contain this information.",
-                "citations": [],
-                "source_summary": [],
-                "error": str(e),
-            }
+            logger.warning(f"Semantic cache skipped, query embedding failed: {e}")
+            return None
+    
+    async def _search_many(
+        self,
+        queries: List[str],
+        top_k: int,
+    ) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Run File Search for several queries at once.
+        
+        Args:
+            queries: Reformulated queries
+            top_k: Number of top results to retrieve
+            
+        Returns:
+            Search result or raised exception per query, in input order
+        """
+        search_many = getattr(self.file_search_service, "search_many", None)
+        if search_many is not None:
+            try:
+                return list(await search_many(queries, top_k=top_k))
+            except Exception as e:
+                return [e] * len(queries)
+        
+        return list(await asyncio.gather(
+            *(self.file_search_service.search(query=q, top_k=top_k) for q in queries),
+            return_exceptions=True,
+        ))
+    
+    def _build_result(self, user_query: str, search_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Validate, cite and audit a File Search result.
+        
+        Args:
+            user_query: Original user query
+            search_result: Search result from File Search API
+            
+        Returns:
+            Dictionary with answer, citations, and source summary
+        """
+        # Steps 3 and 5 (Cross-Reference Validation, Citation Audit) share one grouping pass
+        citations_by_file, source_summary = self._group_citations(search_result.get("citations", []))
         
         # Step 3: Cross-Reference Validation
-        validated_result = self._validate_cross_references(search_result)
+        validated_result = self._validate_cross_references(search_result, citations_by_file)
         
         # Step 4: Synthesized Generation with citations
         answer_with_citations = self._add_citations_to_answer(
@@ -87,9 +233,6 @@ class DeepSearchRAGSentinel:
             validated_result["citations"],
         )
         
-        # Step 5: Citation Audit
-        source_summary = self._audit_citations(validated_result["citations"])
-        
         return {
             "query": user_query,
             "answer": answer_with_citations,
@@ -108,6 +251,10 @@ class DeepSearchRAGSentinel:
         Returns:
             Reformulated query optimized for semantic retrieval
         """
+        # Simple lookups gain nothing from the instruction block, only prompt tokens
+        if self._is_simple_query(query):
+            return query
+        
         # Enhance query with context for better retrieval
         # Add instructions for layout-aware parsing
         enhanced_query = f"""
@@ -123,38 +270,49 @@ class DeepSearchRAGSentinel:
         
         return enhanced_query.strip()
     
-    def _validate_cross_references(self, search_result: Dict[str, Any]) -> Dict[str, Any]:
+    @staticmethod
+    def _is_simple_query(query: str) -> bool:
+        """
+        Check whether a query is a short single-hop lookup.
+        
+        Args:
+            query: Original user query
+            
+        Returns:
+            True if the query has at most 8 words, no and/or/vs connectives
+            and at most one question mark
+        """
+        if len(query.split()) > 8 or query.count("?") > 1:
+            return False
+        lowered = f" {query.lower()} "
+        return not any(connective in lowered for connective in _COMPLEX_QUERY_CONNECTIVES)
+    
+    def _validate_cross_references(
+        self,
+        search_result: Dict[str, Any],
+        citations_by_file: Dict[str, Dict[str, Any]],
+    ) -> Dict[str, Any]:
         """
         Compare retrieved chunks to ensure no conflicting data exists.
         
         Args:
             search_result: Search result from File Search API
+            citations_by_file: Citations grouped by filename (from _group_citations)
             
         Returns:
             Validated search result with conflict detection
         """
-        answer = search_result.get("answer", "")
-        citations = search_result.get("citations", [])
-        
         # Check for conflicting information
         # This is a simplified version - in production, you might want to
         # do more sophisticated conflict detection
         
-        # Group citations by filename
-        citations_by_file = {}
-        for citation in citations:
-            filename = citation.get("filename", "Unknown")
-            if filename not in citations_by_file:
-                citations_by_file[filename] = []
-            citations_by_file[filename].append(citation)
-        
         # Add conflict detection note if multiple sources
         if len(citations_by_file) > 1:
             logger.info(f"Information found across {len(citations_by_file)} different documents")
         
         return {
-            "answer": answer,
-            "citations": citations,
+            "answer": search_result.get("answer", ""),
+            "citations": search_result.get("citations", []),
             "grounding_metadata": search_result.get("grounding_metadata", {}),
             "conflict_detected": False,  # Simplified - could be enhanced
         }
@@ -179,17 +337,13 @@ class DeepSearchRAGSentinel:
             return self._normalize_citation_format(answer)
         
         # Add citations at the end of the answer
-        citation_text = "\n\n**Sources:**\n"
-        for i, citation in enumerate(citations, 1):
+        lines = ["\n\n**Sources:**"]
+        for citation in citations:
             filename = citation.get("filename", "Unknown")
             page = citation.get("page")
-            
-            if page:
-                citation_text += f"[Source: {filename}, Page {page}]\n"
-            else:
-                citation_text += f"[Source: {filename}]\n"
+            lines.append(f"[Source: {filename}, Page {page}]" if page else f"[Source: {filename}]")
         
-        return answer + citation_text
+        return answer + "\n".join(lines) + "\n"
     
     def _normalize_citation_format(self, text: str) -> str:
         """
@@ -201,50 +355,56 @@ class DeepSearchRAGSentinel:
         Returns:
             Text with normalized citations
         """
-        # Pattern to match various citation formats
-        patterns = [
-            (r'\[Source:\s*([^,]+),\s*Page\s*(\d+)\]', r'[Source: \1, Page \2]'),
-            (r'\[Source:\s*([^\]]+)\]', r'[Source: \1]'),
-        ]
-        
-        for pattern, replacement in patterns:
-            text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+        if "[Source:" not in text:
+            return text
         
-        return text
+        text = _CITE_RE_FULL.sub(r'[Source: \1, Page \2]', text)
+        return _CITE_RE_SHORT.sub(r'[Source: \1]', text)
     
-    def _audit_citations(self, citations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _group_citations(
+        self,
+        citations: List[Dict[str, Any]],
+    ) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
         """
-        Verify that every claim in the response is mapped to a specific file and page.
+        Group citations by file and build the audit source summary in one pass.
+        
+        Verifies that every claim in the response is mapped to a specific file and page.
         
         Args:
             citations: List of citations
             
         Returns:
-            Source summary with all documents accessed
+            Tuple of (citations grouped by filename, source summary with all
+            documents accessed)
         """
-        source_summary = []
-        seen_files = set()
+        # Single pass: pages collected per file in a set, files kept in first-seen order
+        by_file: Dict[str, Dict[str, Any]] = {}
+        # LLMs often cite the same chunk repeatedly; skip exact (filename, page) repeats
+        seen: Set[Tuple[str, Any]] = set()
         
         for citation in citations:
             filename = citation.get("filename", "Unknown")
             page = citation.get("page")
-            confidence = citation.get("confidence")
+            key = (filename, page)
+            if key in seen:
+                continue
+            seen.add(key)
             
-            if filename not in seen_files:
-                source_summary.append({
-                    "filename": filename,
-                    "pages": [page] if page else [],
-                    "confidence": confidence,
-                })
-                seen_files.add(filename)
-            else:
-                # Add page to existing file entry
-                for source in source_summary:
-                    if source["filename"] == filename and page:
-                        if page not in source["pages"]:
-                            source["pages"].append(page)
-        
-        return source_summary
+            entry = by_file.get(filename)
+            if entry is None:
+                entry = by_file[filename] = {
+                    "pages": set(),
+                    "confidence": citation.get("confidence"),
+                }
+            if page:
+                entry["pages"].add(page)
+        
+        source_summary = [
+            {"filename": filename, "pages": sorted(entry["pages"]), "confidence": entry["confidence"]}
+            for filename, entry in by_file.items()
+        ]
+        
+        return by_file, source_summary
     
     async def upload_document(
         self,
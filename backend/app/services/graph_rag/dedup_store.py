@@ -0,0 +1,139 @@
+"""
+Ingestion Dedup Store
+Records content hashes of ingested texts so re-uploads are skipped across
+requests, workers and restarts.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessedHashStore:
+    """
+    Set of processed content digests.
+    
+    An in-process set answers repeat checks without I/O; a SQLite table
+    (when a path is configured) persists digests and shares them with other
+    worker processes on the same host. Digests are raw 32-byte SHA256
+    values rather than hex strings, halving the size of each entry.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize dedup store.
+        
+        Args:
+            path: SQLite database file (None keeps digests in memory only)
+        """
+        self._local: Set[bytes] = set()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS processed_hashes (digest BLOB PRIMARY KEY)")
+    
+    def seen(self, digest: bytes) -> bool:
+        """
+        Check whether a digest has been recorded.
+        
+        Args:
+            digest: Content digest
+        
+        Returns:
+            True if the content was already processed
+        """
+        if digest in self._local:
+            return True
+        if self._conn is None:
+            return False
+        
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM processed_hashes WHERE digest = ?", (digest,)
+            ).fetchone()
+        if row is not None:
+            # Recorded by another worker or a previous run; remember it locally
+            self._local.add(digest)
+            return True
+        return False
+    
+    def add(self, digest: bytes) -> None:
+        """
+        Record a digest as processed.
+        
+        Args:
+            digest: Content digest
+        """
+        self._local.add(digest)
+        if self._conn is None:
+            return
+        
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO processed_hashes (digest) VALUES (?)", (digest,)
+            )
+    
+    async def aseen(self, digest: bytes) -> bool:
+        """
+        Async variant of seen() that keeps SQLite reads off the event loop.
+        
+        Args:
+            digest: Content digest
+        
+        Returns:
+            True if the content was already processed
+        """
+        if digest in self._local:
+            return True
+        if self._conn is None:
+            return False
+        return await asyncio.to_thread(self.seen, digest)
+    
+    async def aadd(self, digest: bytes) -> None:
+        """
+        Async variant of add() that keeps SQLite writes off the event loop.
+        
+        Args:
+            digest: Content digest
+        """
+        if self._conn is None:
+            self._local.add(digest)
+            return
+        await asyncio.to_thread(self.add, digest)
+
+
+# Global dedup store instance
+_processed_hash_store: Optional[ProcessedHashStore] = None
+_processed_hash_store_lock = threading.Lock()
+
+
+def get_processed_hash_store() -> ProcessedHashStore:
+    """
+    Get or create the global dedup store.
+    
+    Falls back to an in-memory store if the database cannot be opened.
+    
+    Returns:
+        ProcessedHashStore instance
+    """
+    global _processed_hash_store
+    
+    with _processed_hash_store_lock:
+        if _processed_hash_store is None:
+            try:
+                _processed_hash_store = ProcessedHashStore(settings.INGEST_DEDUP_PATH or None)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"[INGEST] Persistent dedup store unavailable, using memory only: {e}")
+                _processed_hash_store = ProcessedHashStore()
+    
+    return _processed_hash_store
@@ -0,0 +1,132 @@
+"""
+Extraction Result Cache
+Persistent exact-match cache of LLM extraction results, keyed by a digest
+of the model, ontology prompt and chunk text, so re-ingesting the same text
+(under any document ID) skips the LLM.
+"""
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import orjson
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Cached extractions expire after a week
+EXTRACTION_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+
+class ExtractionCache:
+    """
+    SQLite-backed key/value store for extraction results.
+    
+    Values are stored as orjson-encoded blobs with an absolute expiry time.
+    All access goes through one connection guarded by a lock, so the cache
+    can be shared by extractors running on different threads.
+    """
+    
+    def __init__(self, path: str, ttl: int = EXTRACTION_CACHE_TTL_SECONDS):
+        """
+        Initialize extraction cache.
+        
+        Args:
+            path: SQLite database file (parent directories are created)
+            ttl: Seconds a cached result stays valid
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS extractions ("
+            "key BLOB PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+    
+    @staticmethod
+    def key_for(model: str, prompt_prefix: str, text: str) -> bytes:
+        """
+        Build the cache key for one chunk's extraction.
+        
+        The prompt prefix embeds the ontology instructions, so changing the
+        ontology changes every key and old results are never served. The
+        document ID is left out: results are cached unlinked and tagged with
+        the requesting document after lookup.
+        
+        Args:
+            model: LLM model name
+            prompt_prefix: Ontology extraction prompt (without the text)
+            text: Chunk text
+        
+        Returns:
+            32-byte BLAKE2b digest
+        """
+        digest = hashlib.blake2b(model.encode("utf-8"), digest_size=32)
+        digest.update(b"\0")
+        digest.update(prompt_prefix.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.digest()
+    
+    def get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        """Get a cached result, or None if missing or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return orjson.loads(row[0])
+    
+    def set(self, key: bytes, value: Dict[str, Any]) -> None:
+        """Store a result, replacing any previous entry for the key."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, orjson.dumps(value), time.time() + self.ttl),
+            )
+    
+    async def aget(self, key: bytes) -> Optional[Dict[str, Any]]:
+        """Async variant of get() that keeps the SQLite read off the event loop."""
+        return await asyncio.to_thread(self.get, key)
+    
+    async def aset(self, key: bytes, value: Dict[str, Any]) -> None:
+        """Async variant of set() that keeps the SQLite write off the event loop."""
+        await asyncio.to_thread(self.set, key, value)
+
+
+# Global extraction cache instance
+_extraction_cache: Optional[ExtractionCache] = None
+_extraction_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """
+    Get or create the global extraction cache.
+    
+    Returns:
+        ExtractionCache instance, or None if caching is disabled or the
+        database cannot be opened
+    """
+    global _extraction_cache
+    
+    if not settings.EXTRACTION_CACHE_PATH:
+        return None
+    
+    with _extraction_cache_lock:
+        if _extraction_cache is None:
+            try:
+                _extraction_cache = ExtractionCache(settings.EXTRACTION_CACHE_PATH)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"[EXTRACT] Extraction cache unavailable: {e}")
+                return None
+    
+    return _extraction_cache
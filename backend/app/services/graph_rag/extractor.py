@@ -5,19 +5,25 @@ Handles entity and relation extraction from text using LLM.
 Implements strict type hints per Cursor Rule guidelines.
 """
 
-import json
+import asyncio
 import logging
 import re
 from typing import Any, Dict, List, Optional
 
+import orjson
 # Fixed: Corrected import path for LLM
 from llama_index.core.llms import LLM
 
+from app.services.graph_rag.extraction_cache import ExtractionCache, get_extraction_cache
 from app.services.graph_rag.ontology import get_extraction_prompt
 from app.services.graph_rag.llm_setup import get_extraction_llm
 
 logger = logging.getLogger(__name__)
 
+# Trailing commas LLMs leave before a closing brace/bracket
+_TRAIL_COMMA_OBJ = re.compile(r',\s*}')
+_TRAIL_COMMA_ARR = re.compile(r',\s*]')
+
 
 class GraphRAGExtractor:
     """
@@ -25,6 +31,8 @@ class GraphRAGExtractor:
     Uses LLM with strict ontology enforcement.
     """
     
+    __slots__ = ("llm", "_prompt_prefix", "_kv")
+    
     def __init__(self, llm: Optional[LLM] = None):
         """
         Initialize GraphRAG extractor.
@@ -38,35 +46,54 @@ class GraphRAGExtractor:
             if self.llm is None:
                 logger.error("[EXTRACT] Failed to initialize LLM - get_extraction_llm() returned None")
             else:
-                logger.info(f"[EXTRACT] LLM initialized successfully: {type(self.llm).__name__}")
+                logger.info("[EXTRACT] LLM initialized successfully: %s", type(self.llm).__name__)
         except Exception as e:
-            logger.error(f"[EXTRACT] Failed to initialize LLM: {type(e).__name__}: {e}", exc_info=True)
+            logger.error("[EXTRACT] Failed to initialize LLM: %s: %s", type(e).__name__, e, exc_info=True)
             self.llm = None
+        
+        # The ontology prompt is static, so build it once per extractor
+        self._prompt_prefix = get_extraction_prompt()
+        self._kv = get_extraction_cache()
     
     async def extract_from_text(
         self,
         text: str,
         document_id: Optional[str] = None,
+        cache: bool = True,
     ) -> Dict[str, Any]:
         """
         Extract entities and relations from text.
         
+        Results for the same text, ontology and model are served from the
+        persistent extraction cache, whatever the document ID; the entities
+        are tagged with this call's document ID after lookup.
+        
         Args:
             text: Input text to extract from
             document_id: Optional document ID to link entities
+            cache: Read and write the extraction cache
             
         Returns:
             Dictionary with 'entities' and 'relations' lists
         """
         # Fixed: Add logging to track extraction process
-        text_preview = text[:200] + "..." if len(text) > 200 else text
-        logger.info(f"[EXTRACT] Starting extraction: document_id={document_id}, text_length={len(text)}, preview={text_preview}")
+        if logger.isEnabledFor(logging.INFO):
+            text_preview = text[:200] + "..." if len(text) > 200 else text
+            logger.info("[EXTRACT] Starting extraction: document_id=%s, text_length=%d, preview=%s", document_id, len(text), text_preview)
         
         # Build extraction prompt
-        prompt = get_extraction_prompt() + f"\n\nTEXT:\n{text}\n\n"
-        
+        parts = [self._prompt_prefix, "\n\nTEXT:\n", text, "\n\n"]
         if document_id:
-            prompt += f"\nDOCUMENT_ID: {document_id}\n"
+            parts.append(f"\nDOCUMENT_ID: {document_id}\n")
+        prompt = "".join(parts)
+        
+        cache_key = None
+        if cache and self._kv is not None:
+            cache_key = ExtractionCache.key_for(str(getattr(self.llm, "model", "")), self._prompt_prefix, text)
+            cached = await self._kv.aget(cache_key)
+            if cached is not None:
+                logger.info("[EXTRACT] Cache hit: %d entities, %d relations", len(cached["entities"]), len(cached["relations"]))
+                return self._link_document(cached["entities"], cached["relations"], document_id)
         
         # Call LLM for extraction
         response_text = None
@@ -77,30 +104,17 @@ class GraphRAGExtractor:
                 logger.error(error_msg)
                 raise RuntimeError(error_msg)
             
-            logger.debug(f"[EXTRACT] Calling LLM with prompt length: {len(prompt)}")
+            logger.debug("[EXTRACT] Calling LLM with prompt length: %d", len(prompt))
             
-            # Try async first, fallback to sync
-            if hasattr(self.llm, "acomplete"):
-                logger.debug("[EXTRACT] Using async LLM call (acomplete)")
-                response = await self.llm.acomplete(prompt)
-            else:
-                logger.debug("[EXTRACT] Using sync LLM call (complete) via asyncio")
-                import asyncio
-                response = await asyncio.to_thread(self.llm.complete, prompt)
-            
-            # Fixed: Extract text from response object properly (LlamaIndex CompletionResponse has .text attribute)
-            if hasattr(response, "text"):
-                response_text = response.text
-            elif hasattr(response, "delta"):
-                # Handle streaming response
-                response_text = "".join([str(d) for d in response.delta])
-            else:
-                response_text = str(response)
+            # Stream the completion: the response is assembled as it arrives, and
+            # cancelling the caller closes the stream instead of running to completion
+            response_text = await self._astream_text(prompt)
             
-            logger.debug(f"[EXTRACT] LLM response received, length: {len(response_text)}, preview: {response_text[:200]}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[EXTRACT] LLM response received, length: %d, preview: %s", len(response_text), response_text[:200])
             
             # Fixed: Handle empty or None response
-            if not response_text or not response_text.strip():
+            if not response_text or response_text.isspace():
                 logger.warning("[EXTRACT] LLM returned empty response")
                 return {"entities": [], "relations": []}
             
@@ -109,106 +123,232 @@ class GraphRAGExtractor:
             original_response = response_text
             
             # Fixed: More robust JSON extraction
-            # Try to find JSON object in response
-            json_start = -1
-            json_end = -1
+            # Locate each delimiter with a single find; later ones only if earlier ones are absent
+            fenced_json_pos = response_text.find("```json")
+            fence_pos = response_text.find("```") if fenced_json_pos == -1 else -1
+            brace_pos = response_text.find("{") if fenced_json_pos == fence_pos == -1 else -1
             
-            # Look for JSON object start
-            if "```json" in response_text:
-                json_start = response_text.find("```json") + 7
+            if fenced_json_pos != -1 or fence_pos != -1:
+                if fenced_json_pos != -1:
+                    json_start = fenced_json_pos + 7
+                    logger.debug("[EXTRACT] Extracted JSON from markdown code block")
+                else:
+                    json_start = fence_pos + 3
+                    logger.debug("[EXTRACT] Extracted JSON from code block")
                 json_end = response_text.find("```", json_start)
                 if json_end == -1:
                     json_end = len(response_text)
                 response_text = response_text[json_start:json_end].strip()
-                logger.debug(f"[EXTRACT] Extracted JSON from markdown code block")
-            elif "```" in response_text:
-                json_start = response_text.find("```") + 3
-                json_end = response_text.find("```", json_start)
-                if json_end == -1:
-                    json_end = len(response_text)
-                response_text = response_text[json_start:json_end].strip()
-                logger.debug(f"[EXTRACT] Extracted JSON from code block")
-            elif "{" in response_text:
-                # Try to find JSON object directly
-                json_start = response_text.find("{")
-                # Find matching closing brace
-                brace_count = 0
-                for i, char in enumerate(response_text[json_start:], json_start):
-                    if char == "{":
-                        brace_count += 1
-                    elif char == "}":
-                        brace_count -= 1
-                        if brace_count == 0:
-                            json_end = i + 1
-                            break
-                if json_end > json_start:
-                    response_text = response_text[json_start:json_end].strip()
-                    logger.debug(f"[EXTRACT] Extracted JSON object from response")
-            
-            # Fixed: Validate JSON before parsing
-            if not response_text.strip():
-                logger.warning(f"[EXTRACT] No JSON content found in response. Original response: {original_response[:500]}")
+            elif brace_pos != -1:
+                # Try to find JSON object directly: outermost braces
+                json_end = response_text.rfind("}") + 1
+                if json_end > brace_pos:
+                    # Slice already starts at '{' and ends at '}', nothing to strip
+                    response_text = response_text[brace_pos:json_end]
+                    logger.debug("[EXTRACT] Extracted JSON object from response")
+            
+            # Fixed: Validate JSON before parsing (fenced slices are stripped above)
+            if not response_text:
+                logger.warning("[EXTRACT] No JSON content found in response. Original response: %s", original_response[:500])
                 return {"entities": [], "relations": []}
             
             # Parse JSON with error handling
-            logger.debug(f"[EXTRACT] Parsing JSON, length: {len(response_text)}")
+            logger.debug("[EXTRACT] Parsing JSON, length: %d", len(response_text))
             try:
-                result = json.loads(response_text)
-            except json.JSONDecodeError as parse_error:
+                result = orjson.loads(response_text)
+            except orjson.JSONDecodeError as parse_error:
                 # Try to fix common JSON issues
                 # Remove trailing commas
-                fixed_json = re.sub(r',\s*}', '}', response_text)
-                fixed_json = re.sub(r',\s*]', ']', fixed_json)
+                fixed_json = _TRAIL_COMMA_OBJ.sub('}', response_text)
+                fixed_json = _TRAIL_COMMA_ARR.sub(']', fixed_json)
                 try:
-                    result = json.loads(fixed_json)
-                    logger.debug(f"[EXTRACT] Fixed JSON parsing issues")
-                except:
+                    result = orjson.loads(fixed_json)
+                    logger.debug("[EXTRACT] Fixed JSON parsing issues")
+                except orjson.JSONDecodeError:
                     raise parse_error
-            logger.debug(f"[EXTRACT] JSON parsed successfully")
+            logger.debug("[EXTRACT] JSON parsed successfully")
             
             # Validate structure
             entities = result.get("entities", [])
             relations = result.get("relations", [])
             
             # Fixed: Log extraction results with more detail
-            logger.info(f"[EXTRACT] Extraction successful: {len(entities)} entities, {len(relations)} relations extracted")
-            if len(entities) == 0 and len(relations) == 0:
-                logger.warning(f"[EXTRACT] WARNING: No entities or relations extracted from text. This may indicate:")
-                logger.warning(f"[EXTRACT] 1. Text content is not suitable for extraction (too short, no named entities)")
-                logger.warning(f"[EXTRACT] 2. LLM response format issue (check logs above for JSON parsing errors)")
-                logger.warning(f"[EXTRACT] 3. Extraction prompt is too strict for this content")
-                logger.warning(f"[EXTRACT] Full LLM response (first 2000 chars): {original_response[:2000]}")
-            if len(entities) > 0:
-                logger.info(f"[EXTRACT] Sample entities: {[e.get('id', e.get('properties', {}).get('name', 'unknown')) for e in entities[:3]]}")
-            if len(relations) > 0:
-                sample_relations = [
-                    f"{r.get('source')} -> {r.get('target')} ({r.get('type')})"
-                    for r in relations[:3]
-                ]
-                logger.info(f"[EXTRACT] Sample relations: {sample_relations}")
-            
-            # Add document_id to entities if provided
-            if document_id:
-                for entity in entities:
-                    if "properties" not in entity:
-                        entity["properties"] = {}
-                    entity["properties"]["document_id"] = document_id
-            
-            return {
-                "entities": entities,
-                "relations": relations,
-            }
-        except json.JSONDecodeError as e:
+            logger.info("[EXTRACT] Extraction successful: %d entities, %d relations extracted", len(entities), len(relations))
+            if len(entities) == 0 and len(relations) == 0 and logger.isEnabledFor(logging.WARNING):
+                logger.warning("[EXTRACT] WARNING: No entities or relations extracted from text. This may indicate:")
+                logger.warning("[EXTRACT] 1. Text content is not suitable for extraction (too short, no named entities)")
+                logger.warning("[EXTRACT] 2. LLM response format issue (check logs above for JSON parsing errors)")
+                logger.warning("[EXTRACT] 3. Extraction prompt is too strict for this content")
+                logger.warning("[EXTRACT] Full LLM response (first 2000 chars): %s", original_response[:2000])
+            if logger.isEnabledFor(logging.INFO):
+                if len(entities) > 0:
+                    logger.info("[EXTRACT] Sample entities: %s", [e.get('id', e.get('properties', {}).get('name', 'unknown')) for e in entities[:3]])
+                if len(relations) > 0:
+                    sample_relations = [
+                        f"{r.get('source')} -> {r.get('target')} ({r.get('type')})"
+                        for r in relations[:3]
+                    ]
+                    logger.info("[EXTRACT] Sample relations: %s", sample_relations)
+            
+            if cache_key is not None and (entities or relations):
+                await self._kv.aset(cache_key, {"entities": entities, "relations": relations})
+            
+            return self._link_document(entities, relations, document_id)
+        except orjson.JSONDecodeError as e:
             # Fixed: Enhanced JSON parsing error logging
-            logger.error(f"[EXTRACT] Failed to parse LLM extraction response as JSON: {e}")
-            logger.error(f"[EXTRACT] JSON error at position {e.pos if hasattr(e, 'pos') else 'unknown'}")
-            logger.error(f"[EXTRACT] Response text (first 1000 chars): {response_text[:1000] if response_text else 'None'}")
-            logger.error(f"[EXTRACT] Response text (last 500 chars): {response_text[-500:] if response_text and len(response_text) > 500 else response_text}")
+            logger.error("[EXTRACT] Failed to parse LLM extraction response as JSON: %s", e)
+            logger.error("[EXTRACT] JSON error at position %s", getattr(e, 'pos', 'unknown'))
+            logger.error("[EXTRACT] Response text (first 1000 chars): %s", response_text[:1000] if response_text else 'None')
+            logger.error("[EXTRACT] Response text (last 500 chars): %s", response_text[-500:] if response_text and len(response_text) > 500 else response_text)
             return {"entities": [], "relations": []}
         except Exception as e:
             # Fixed: Enhanced exception logging
-            logger.error(f"[EXTRACT] Error during extraction: {type(e).__name__}: {e}", exc_info=True)
+            logger.error("[EXTRACT] Error during extraction: %s: %s", type(e).__name__, e, exc_info=True)
             if response_text:
-                logger.error(f"[EXTRACT] Response text at error: {response_text[:500]}")
+                logger.error("[EXTRACT] Response text at error: %s", response_text[:500])
             return {"entities": [], "relations": []}
-
+    
+    async def _astream_text(self, prompt: str) -> str:
+        """
+        Stream a completion and join its deltas.
+        
+        Args:
+            prompt: Extraction prompt
+            
+        Returns:
+            Full response text
+        """
+        stream = await self.llm.astream_complete(prompt)
+        
+        parts: List[str] = []
+        async for chunk in stream:
+            if chunk.delta:
+                parts.append(chunk.delta)
+        return "".join(parts)
+    
+    async def extract_from_chunks(
+        self,
+        texts: List[str],
+        document_id: Optional[str] = None,
+        concurrency: int = 8,
+    ) -> Dict[str, Any]:
+        """
+        Extract entities and relations from several text chunks concurrently.
+        
+        At most `concurrency` LLM calls are in flight at once, and each one
+        counts against the provider's rate limit (free OpenRouter models allow
+        only a handful of requests per minute). Keep it at or below that limit:
+        throttled calls are not retried here, they come back as errors that
+        extract_from_text turns into an empty result for that chunk.
+        
+        Entities without an id get one derived from their type and name before
+        merging, so distinct id-less entities are not collapsed together.
+        
+        Args:
+            texts: Text chunks to extract from
+            document_id: Optional document ID to link entities
+            concurrency: Maximum number of concurrent LLM calls
+            
+        Returns:
+            Dictionary with merged 'entities' (deduplicated by id) and
+            'relations' (deduplicated by source, target and type) lists, plus
+            'chunks_processed' and 'chunks_with_entities' counts
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def _extract_one(idx: int, text: str) -> Dict[str, Any]:
+            async with semaphore:
+                logger.debug("[EXTRACT] Processing chunk %d/%d, length=%d", idx + 1, len(texts), len(text))
+                return await self.extract_from_text(text, document_id)
+        
+        # return_exceptions: one failing chunk doesn't abort the others
+        results = await asyncio.gather(
+            *(_extract_one(idx, text) for idx, text in enumerate(texts)),
+            return_exceptions=True,
+        )
+        
+        chunks_processed = 0
+        chunks_with_entities = 0
+        entities_by_id: Dict[str, Dict[str, Any]] = {}
+        relations_by_key: Dict[tuple, Dict[str, Any]] = {}
+        for idx, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.error("[EXTRACT] Failed to extract from chunk %d/%d: %s: %s", idx + 1, len(texts), type(result).__name__, result)
+                continue
+            chunks_processed += 1
+            if result["entities"] or result["relations"]:
+                chunks_with_entities += 1
+            
+            for entity in result["entities"]:
+                if not entity.get("id"):
+                    entity["id"] = self._entity_id(entity)
+                    logger.warning("[EXTRACT] Generated entity ID: %s for entity without ID", entity["id"])
+                existing = entities_by_id.get(entity["id"])
+                if existing is None:
+                    entities_by_id[entity["id"]] = entity
+                else:
+                    # Keep the first occurrence, filling in properties it lacks
+                    properties = existing.setdefault("properties", {})
+                    for key, value in entity.get("properties", {}).items():
+                        properties.setdefault(key, value)
+            
+            for relation in result["relations"]:
+                # Types are compared case-insensitively; they are upper-cased when written
+                key = (relation.get("source"), relation.get("target"), str(relation.get("type", "")).lower())
+                existing = relations_by_key.get(key)
+                if existing is None:
+                    relations_by_key[key] = relation
+                else:
+                    properties = existing.setdefault("properties", {})
+                    for prop, value in relation.get("properties", {}).items():
+                        properties.setdefault(prop, value)
+        
+        logger.info("[EXTRACT] Extracted %d entities, %d relations from %d chunks", len(entities_by_id), len(relations_by_key), len(texts))
+        return {
+            "entities": list(entities_by_id.values()),
+            "relations": list(relations_by_key.values()),
+            "chunks_processed": chunks_processed,
+            "chunks_with_entities": chunks_with_entities,
+        }
+    
+    @staticmethod
+    def _entity_id(entity: Dict[str, Any]) -> str:
+        """
+        Derive a stable id for an entity the LLM returned without one.
+        
+        Args:
+            entity: Extracted entity
+            
+        Returns:
+            Id of the form "<type>_<name>" (e.g. "person_john_doe")
+        """
+        entity_type = entity.get("type", "entity").lower()
+        entity_name = str(entity.get("properties", {}).get("name", "unknown"))
+        return f"{entity_type}_{entity_name.lower().replace(' ', '_').replace('-', '_')}"
+    
+    @staticmethod
+    def _link_document(
+        entities: List[Dict[str, Any]],
+        relations: List[Dict[str, Any]],
+        document_id: Optional[str],
+    ) -> Dict[str, Any]:
+        """
+        Build the extraction result, tagging entities with the document ID.
+        
+        Args:
+            entities: Extracted entities
+            relations: Extracted relations
+            document_id: Optional document ID to link entities
+            
+        Returns:
+            Dictionary with 'entities' and 'relations' lists
+        """
+        # Add document_id to entities if provided
+        if document_id:
+            for entity in entities:
+                entity.setdefault("properties", {})["document_id"] = document_id
+        
+        return {
+            "entities": entities,
+            "relations": relations,
+        }
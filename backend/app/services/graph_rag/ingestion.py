@@ -6,23 +6,317 @@ Implements hierarchical (Parent-Child) chunking strategy for maximum accuracy.
 Follows Cursor Rule: rag_architecture.mdc guidelines.
 """
 
+import asyncio
+import atexit
 import hashlib
 import logging
-from typing import Any, Dict, List, Optional
+import multiprocessing
+import os
+import re
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
+import orjson
 from llama_index.core import Document
 from llama_index.core.node_parser import (
-    HierarchicalNodeParser,
     SimpleNodeParser,
     SentenceSplitter,
 )
+from qdrant_client import models
 
 from app.core.config import settings
 from app.core.database import get_neo4j_driver, get_qdrant_client
+from app.services.graph_rag.dedup_store import get_processed_hash_store
 from app.services.graph_rag.extractor import GraphRAGExtractor
+from app.services.graph_rag.ontology import ENTITY_LABEL
 
 logger = logging.getLogger(__name__)
 
+# Rows per UNWIND statement; keeps each Bolt message well under driver frame limits
+NEO4J_UNWIND_BATCH_SIZE = 1000
+
+# Labels whose constraint/indexes were ensured in this process (schema is permanent once created)
+_indexed_labels: Set[str] = set()
+
+# Labels and relationship types are interpolated into Cypher, so they must be plain identifiers
+_CYPHER_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_NON_IDENTIFIER_CHARS_RE = re.compile(r"[^A-Za-z0-9_]")
+
+
+def _batches(rows: List[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Yield consecutive slices of at most `size` rows."""
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+async def ensure_entity_schema(session: Any) -> None:
+    """
+    Create the shared source_id index and label nodes written before ENTITY_LABEL existed.
+    
+    Idempotent: the backfill only touches nodes that still lack the label,
+    committing in batches so a large graph isn't relabelled in one transaction.
+    Must run in an auto-commit session (CALL ... IN TRANSACTIONS).
+    
+    Args:
+        session: Neo4j session
+    """
+    try:
+        result = await session.run(
+            f"CREATE INDEX {ENTITY_LABEL.lower()}_source_id IF NOT EXISTS "
+            f"FOR (n:{ENTITY_LABEL}) ON (n.source_id)"
+        )
+        await result.consume()
+    except Exception as e:
+        logger.warning("[INGEST] Could not create source_id index for :%s: %s", ENTITY_LABEL, e)
+    try:
+        result = await session.run(
+            f"MATCH (n) WHERE n.source_id IS NOT NULL AND NOT n:{ENTITY_LABEL} "
+            f"CALL {{ WITH n SET n:{ENTITY_LABEL} }} IN TRANSACTIONS OF {NEO4J_UNWIND_BATCH_SIZE} ROWS"
+        )
+        await result.consume()
+    except Exception as e:
+        logger.warning("[INGEST] Could not backfill :%s label: %s", ENTITY_LABEL, e)
+    _indexed_labels.add(ENTITY_LABEL)
+
+
+async def _ensure_label_indexes(session: Any, labels: Iterable[str]) -> None:
+    """
+    Create the graph schema (per-label id constraint, shared source_id index) not created yet.
+    
+    The constraint's backing index turns MERGE/MATCH on `{id: ...}` into an
+    index seek instead of a label scan. Every extracted node also carries the
+    shared ENTITY_LABEL, so one source_id index on it serves document-scoped
+    lookups such as the knowledge graph export.
+    
+    Args:
+        session: Neo4j session
+        labels: Node labels about to be written
+    """
+    if ENTITY_LABEL not in _indexed_labels:
+        await ensure_entity_schema(session)
+    
+    for label in labels:
+        if label in _indexed_labels:
+            continue
+        try:
+            result = await session.run(
+                f"CREATE CONSTRAINT {label.lower()}_id_unique IF NOT EXISTS "
+                f"FOR (n:{label}) REQUIRE n.id IS UNIQUE"
+            )
+            await result.consume()
+        except Exception as e:
+            # e.g. existing duplicate ids; writes still work, just without the index
+            logger.warning("[INGEST] Could not create id constraint for :%s: %s", label, e)
+        _indexed_labels.add(label)
+
+
+def _neo4j_property_value(value: Any) -> Any:
+    """
+    Coerce an LLM-supplied property value into something Neo4j can store.
+    
+    Neo4j properties are primitives or homogeneous lists of primitives; maps,
+    nested lists and mixed lists would fail the whole write transaction, so
+    they are stored as JSON strings instead.
+    
+    Args:
+        value: Raw property value
+    
+    Returns:
+        Value safe to SET on a node or relationship
+    """
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return value
+    if isinstance(value, list) and all(
+        isinstance(item, (int, float)) and not isinstance(item, bool) for item in value
+    ):
+        return value
+    return orjson.dumps(value, default=str).decode("utf-8")
+
+
+def _neo4j_properties(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a property map with every value made storable by Neo4j."""
+    return {str(key): _neo4j_property_value(value) for key, value in properties.items()}
+
+
+def _cypher_identifier(name: str, default: str) -> str:
+    """
+    Coerce an LLM-supplied type name into a safe Cypher label/relationship type.
+    
+    Args:
+        name: Raw type name (e.g. "THREAT ACTOR")
+        default: Fallback when nothing usable remains
+    
+    Returns:
+        Identifier matching _CYPHER_IDENTIFIER_RE (e.g. "THREAT_ACTOR")
+    """
+    identifier = _NON_IDENTIFIER_CHARS_RE.sub("_", name)
+    return identifier if _CYPHER_IDENTIFIER_RE.match(identifier) else default
+
+
+def _check_identifiers(*names: Optional[str]) -> None:
+    """Raise ValueError if any non-empty name is not a plain Cypher identifier."""
+    for name in names:
+        if name and not _CYPHER_IDENTIFIER_RE.match(name):
+            raise ValueError(f"Invalid Cypher identifier: {name!r}")
+
+
+@lru_cache(maxsize=128)
+def _merge_node_query(label: str) -> str:
+    """Build (once per label) the UNWIND/MERGE statement for node rows."""
+    _check_identifiers(label)
+    return f"UNWIND $rows AS row MERGE (n:{label} {{id: row.id}}) SET n:{ENTITY_LABEL}, n += row.props"
+
+
+@lru_cache(maxsize=128)
+def _merge_edge_query(source_label: Optional[str], rel_type: str, target_label: Optional[str]) -> str:
+    """Build (once per label/type combination) the UNWIND/MERGE statement for edge rows."""
+    _check_identifiers(source_label, rel_type, target_label)
+    source_pattern = f"a:{source_label}" if source_label else "a"
+    target_pattern = f"b:{target_label}" if target_label else "b"
+    return (
+        f"UNWIND $rows AS row "
+        f"MATCH ({source_pattern} {{id: row.src}}) "
+        f"MATCH ({target_pattern} {{id: row.tgt}}) "
+        f"MERGE (a)-[r:{rel_type}]->(b) SET r += row.props"
+    )
+
+
+async def _upload_tx(
+    tx: Any,
+    node_rows_by_label: Dict[str, List[Dict[str, Any]]],
+    edge_rows_by_key: Dict[Tuple[Optional[str], Optional[str], str], List[Dict[str, Any]]],
+) -> Tuple[int, int]:
+    """
+    Write a document's grouped nodes and edges inside one managed transaction.
+    
+    Each label (or label/type combination) is written with batched UNWIND
+    statements, run one after another; the document commits once at the end.
+    
+    Args:
+        tx: Neo4j managed transaction
+        node_rows_by_label: Node rows ({"id", "props"}) grouped by label
+        edge_rows_by_key: Edge rows ({"src", "tgt", "props"}) grouped by
+            (source label, target label, relationship type)
+    
+    Returns:
+        Tuple of (node rows written, edge rows written)
+    """
+    nodes_written = 0
+    for entity_type, rows in node_rows_by_label.items():
+        query = _merge_node_query(entity_type)
+        for batch in _batches(rows, NEO4J_UNWIND_BATCH_SIZE):
+            await tx.run(query, rows=batch)
+            nodes_written += len(batch)
+    
+    edges_written = 0
+    for (source_label, target_label, rel_type), rows in edge_rows_by_key.items():
+        query = _merge_edge_query(source_label, rel_type, target_label)
+        for batch in _batches(rows, NEO4J_UNWIND_BATCH_SIZE):
+            await tx.run(query, rows=batch)
+            edges_written += len(batch)
+    
+    return nodes_written, edges_written
+
+
+# Parent chunks preserve full context for graph extraction; child chunks give precise vector retrieval
+PARENT_CHUNK_SIZE = 1024
+PARENT_CHUNK_OVERLAP = 200
+CHILD_CHUNK_SIZE = 256
+CHILD_CHUNK_OVERLAP = 50
+
+# CPU-bound chunking of large texts runs in worker processes instead of on the event loop;
+# capped because every server worker process gets its own pool
+CHUNKING_MAX_WORKERS = 4
+_chunking_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_chunking_executor() -> ProcessPoolExecutor:
+    """Lazy initialization of the chunking process pool."""
+    global _chunking_executor
+    if _chunking_executor is None:
+        # forkserver: the server already runs threads (DB drivers, executors), and
+        # forking a multi-threaded process can deadlock the child
+        _chunking_executor = ProcessPoolExecutor(
+            max_workers=min(CHUNKING_MAX_WORKERS, os.cpu_count() or 1),
+            mp_context=multiprocessing.get_context("forkserver"),
+        )
+        atexit.register(_chunking_executor.shutdown, wait=False)
+    return _chunking_executor
+
+
+@lru_cache(maxsize=1)
+def _get_node_parsers() -> Tuple[SimpleNodeParser, SentenceSplitter]:
+    """Build the (parent, child) node parsers once per process."""
+    parent_parser = SimpleNodeParser.from_defaults(
+        chunk_size=PARENT_CHUNK_SIZE,
+        chunk_overlap=PARENT_CHUNK_OVERLAP,
+    )
+    child_parser = SentenceSplitter.from_defaults(
+        chunk_size=CHILD_CHUNK_SIZE,
+        chunk_overlap=CHILD_CHUNK_OVERLAP,
+    )
+    return parent_parser, child_parser
+
+
+def _hash_text(text: str, source_id: str) -> bytes:
+    """
+    Compute the idempotency digest of a source's text.
+    
+    Args:
+        text: Text content
+        source_id: Source identifier
+        
+    Returns:
+        Raw 32-byte SHA256 digest
+    """
+    # Feed the parts separately instead of building a concatenated copy of the text
+    digest = hashlib.sha256(source_id.encode('utf-8'))
+    digest.update(b':')
+    digest.update(text.encode('utf-8'))
+    return digest.digest()
+
+
+def _chunk_document(text: str, metadata: Dict[str, Any], hierarchical: bool) -> Tuple[List[Any], List[Any]]:
+    """
+    Split a text into extraction and vector nodes.
+    
+    Module-level and free of pipeline state so it can run in a worker process.
+    
+    Args:
+        text: Text content
+        metadata: Document metadata inherited by every node
+        hierarchical: Parent-Child chunking if True, else one flat chunking
+        
+    Returns:
+        Tuple of (extraction nodes, vector nodes); the same list twice when
+        not hierarchical
+    """
+    parent_parser, child_parser = _get_node_parsers()
+    document = Document(text=text, metadata=metadata)
+    
+    if not hierarchical:
+        nodes = parent_parser.get_nodes_from_documents([document])
+        return nodes, nodes
+    
+    # Create parent chunks (1024 tokens) for graph extraction
+    parent_nodes = parent_parser.get_nodes_from_documents([document])
+    
+    # Create child chunks (256 tokens) for vector retrieval in one splitter pass;
+    # children inherit the parent link from their parent document's metadata
+    parent_docs = [
+        Document(
+            text=parent_node.get_content(),
+            metadata={**parent_node.metadata, "parent_id": parent_node.node_id, "is_child": True},
+        )
+        for parent_node in parent_nodes
+    ]
+    child_nodes = child_parser.get_nodes_from_documents(parent_docs)
+    return parent_nodes, child_nodes
+
 
 class IngestionPipeline:
     """
@@ -68,29 +362,11 @@ class IngestionPipeline:
             self.extraction_enabled = False
         self.use_enhanced = use_enhanced
         
-        # Implement hierarchical chunking per Cursor Rule guidelines
-        if use_hierarchical_chunking:
-            # Parent chunks: 1024 tokens to preserve full context for graph extraction
-            # Child chunks: 256 tokens for precise vector retrieval
-            self.parent_parser = SimpleNodeParser.from_defaults(
-                chunk_size=1024,
-                chunk_overlap=200,
-            )
-            self.child_parser = SentenceSplitter.from_defaults(
-                chunk_size=256,
-                chunk_overlap=50,
-            )
-            self.use_hierarchical = True
-        else:
-            # Fallback to simple chunking
-            self.node_parser = SimpleNodeParser.from_defaults(
-                chunk_size=1024,
-                chunk_overlap=200,
-            )
-            self.use_hierarchical = False
+        # Implement hierarchical chunking per Cursor Rule guidelines (parsers live in _chunk_document)
+        self.use_hierarchical = use_hierarchical_chunking
         
-        # Track processed file hashes for idempotency
-        self._processed_hashes: set[str] = set()
+        # Processed content hashes for idempotency (shared across pipelines and persisted)
+        self._dedup_store = get_processed_hash_store()
     
     async def ingest_text(
         self,
@@ -122,11 +398,20 @@ class IngestionPipeline:
         if not text or not text.strip():
             raise RuntimeError("Text content cannot be empty")
         
-        # Idempotency: Check file hash before processing
+        # Idempotency: Check file hash before any chunking or extraction (hashed once, reused when marking done)
+        offload = len(text) >= settings.INGEST_OFFLOAD_MIN_CHARS
+        loop = asyncio.get_running_loop()
+        text_hash = None
         if check_hash:
-            text_hash = self._compute_text_hash(text, source_id)
-            if text_hash in self._processed_hashes:
-                logger.info(f"Skipping duplicate ingestion: source_id={source_id}, hash={text_hash[:8]}...")
+            # Large texts hash in a thread, not the process pool: hashlib releases the GIL
+            # on big buffers, and the text only crosses IPC once (for chunking)
+            text_hash = (
+                await asyncio.to_thread(_hash_text, text, source_id)
+                if offload else _hash_text(text, source_id)
+            )
+        if text_hash is not None:
+            if await self._dedup_store.aseen(text_hash):
+                logger.info(f"Skipping duplicate ingestion: source_id={source_id}, hash={text_hash.hex()[:8]}...")
                 return {
                     "source_id": source_id,
                     "source_name": source_name,
@@ -138,44 +423,25 @@ class IngestionPipeline:
                 }
         
         try:
-            # Step 1: Create document
-            document = Document(
-                text=text,
-                metadata={
-                    "source_id": source_id,
-                    "source_name": source_name or source_id,
-                    "clearance_level": clearance_level,
-                },
-            )
-            
-            # Step 2: Hierarchical chunking (Parent-Child strategy)
-            if self.use_hierarchical:
-                # Create parent chunks (1024 tokens) for graph extraction
-                parent_nodes = self.parent_parser.get_nodes_from_documents([document])
-                
-                # Create child chunks (256 tokens) for vector retrieval
-                child_nodes = []
-                for parent_node in parent_nodes:
-                    parent_doc = Document(
-                        text=parent_node.get_content(),
-                        metadata=parent_node.metadata.copy(),
-                    )
-                    children = self.child_parser.get_nodes_from_documents([parent_doc])
-                    # Link children to parent
-                    for child in children:
-                        child.metadata["parent_id"] = parent_node.node_id
-                        child.metadata["is_child"] = True
-                    child_nodes.extend(children)
-                
-                # Use parent nodes for graph extraction (preserve full context)
-                extraction_nodes = parent_nodes
-                # Use child nodes for vector storage (precise retrieval)
-                vector_nodes = child_nodes
+            # Step 1 + 2: Create document and chunk it (Parent-Child strategy when hierarchical)
+            metadata = {
+                "source_id": source_id,
+                "source_name": source_name or source_id,
+                "clearance_level": clearance_level,
+            }
+            if offload:
+                extraction_nodes, vector_nodes = await loop.run_in_executor(
+                    _get_chunking_executor(), _chunk_document, text, metadata, self.use_hierarchical
+                )
             else:
-                # Fallback to simple chunking
-                nodes = self.node_parser.get_nodes_from_documents([document])
-                extraction_nodes = nodes
-                vector_nodes = nodes
+                extraction_nodes, vector_nodes = _chunk_document(text, metadata, self.use_hierarchical)
+            
+            # Materialize node contents once (get_content() re-renders the text each call)
+            extraction_texts = [node.get_content() for node in extraction_nodes]
+            vector_texts = (
+                extraction_texts if vector_nodes is extraction_nodes
+                else [node.get_content() for node in vector_nodes]
+            )
             
             # Step 3: Extract entities and relations from parent chunks
             all_nodes = []
@@ -186,71 +452,43 @@ class IngestionPipeline:
                 # Fixed: Add logging for extraction process
                 logger.info(f"[INGEST] Starting extraction from {len(extraction_nodes)} chunks for source_id={source_id}")
                 
-                chunks_processed = 0
-                chunks_with_entities = 0
+                # Per-chunk LLM calls run concurrently, bounded to respect provider rate limits;
+                # entities come back with ids and merged across chunks
+                extraction = await self.extractor.extract_from_chunks(
+                    extraction_texts,
+                    document_id=source_id,
+                    concurrency=settings.INGEST_EXTRACTION_CONCURRENCY,
+                )
+                chunks_processed = extraction["chunks_processed"]
+                chunks_with_entities = extraction["chunks_with_entities"]
+                
+                # Convert entities to nodes
+                for entity in extraction["entities"]:
+                    entity_props = entity.get("properties", {})
+                    all_nodes.append({
+                        "id": entity["id"],
+                        "label": entity_props.get("name", entity["id"]),
+                        "type": entity.get("type", "entity").lower(),
+                        "properties": entity_props,
+                    })
                 
-                for idx, node in enumerate(extraction_nodes):
-                    chunk_text = node.get_content()
-                    chunk_preview = chunk_text[:100] + "..." if len(chunk_text) > 100 else chunk_text
-                    logger.debug(f"[INGEST] Processing chunk {idx + 1}/{len(extraction_nodes)}, length={len(chunk_text)}, preview={chunk_preview}")
+                # Convert relations to edges
+                for relation in extraction["relations"]:
+                    rel_source = relation.get("source", "")
+                    rel_target = relation.get("target", "")
                     
-                    try:
-                        extraction_result = await self.extractor.extract_from_text(
-                            text=chunk_text,
-                            document_id=source_id,
-                        )
-                        
-                        chunks_processed += 1
-                        
-                        # Simplified: Always use basic format (entities and relations)
-                        entities = extraction_result.get("entities", [])
-                        relations = extraction_result.get("relations", [])
-                        
-                        if len(entities) > 0 or len(relations) > 0:
-                            chunks_with_entities += 1
-                            logger.debug(f"[INGEST] Chunk {idx + 1} extracted {len(entities)} entities, {len(relations)} relations")
-                        
-                        # Convert entities to nodes
-                        for entity in entities:
-                            entity_id = entity.get("id", "")
-                            entity_props = entity.get("properties", {})
-                            entity_name = entity_props.get("name", entity_id)
-                            
-                            # Fixed: Generate entity ID if missing
-                            if not entity_id:
-                                entity_type = entity.get("type", "entity").lower()
-                                entity_id = f"{entity_type}_{entity_name.lower().replace(' ', '_').replace('-', '_')}"
-                                logger.warning(f"[INGEST] Generated entity ID: {entity_id} for entity without ID")
-                            
-                            all_nodes.append({
-                                "id": entity_id,
-                                "label": entity_name,
-                                "type": entity.get("type", "entity").lower(),
-                                "properties": entity_props,
-                            })
-                        
-                        # Convert relations to edges
-                        for relation in relations:
-                            source_id = relation.get("source", "")
-                            target_id = relation.get("target", "")
-                            
-                            # Fixed: Skip relations with missing source or target
-                            if not source_id or not target_id:
-                                logger.warning(f"[INGEST] Skipping relation with missing source or target: source={source_id}, target={target_id}")
-                                continue
-                            
-                            all_edges.append({
-                                "source": source_id,
-                                "target": target_id,
-                                "relationship": relation.get("type", "related_to").lower(),
-                                "weight": relation.get("properties", {}).get("weight", 1.0),
-                                "properties": relation.get("properties", {}),
-                            })
-                    except Exception as e:
-                        # Fixed: Enhanced error logging for chunk extraction failures
-                        logger.error(f"[INGEST] Failed to extract from chunk {idx + 1}/{len(extraction_nodes)}: {type(e).__name__}: {e}", exc_info=True)
-                        # Continue processing other chunks
+                    # Fixed: Skip relations with missing source or target
+                    if not rel_source or not rel_target:
+                        logger.warning(f"[INGEST] Skipping relation with missing source or target: source={rel_source}, target={rel_target}")
                         continue
+                    
+                    all_edges.append({
+                        "source": rel_source,
+                        "target": rel_target,
+                        "relationship": relation.get("type", "related_to").lower(),
+                        "weight": relation.get("properties", {}).get("weight", 1.0),
+                        "properties": relation.get("properties", {}),
+                    })
                 
                 # Fixed: Log extraction summary
                 logger.info(f"[INGEST] Extraction complete: {chunks_processed}/{len(extraction_nodes)} chunks processed, {chunks_with_entities} chunks with entities, total entities={len(all_nodes)}, total relations={len(all_edges)}")
@@ -270,12 +508,11 @@ class IngestionPipeline:
             await self._store_in_neo4j(all_nodes, all_edges, source_id)
             
             # Step 5: Store in Qdrant (vector store) - use child nodes for precise retrieval
-            await self._store_in_qdrant(vector_nodes, source_id, clearance_level)
+            await self._store_in_qdrant(vector_nodes, vector_texts, source_id, clearance_level)
             
             # Mark as processed for idempotency
-            if check_hash:
-                text_hash = self._compute_text_hash(text, source_id)
-                self._processed_hashes.add(text_hash)
+            if text_hash is not None:
+                await self._dedup_store.aadd(text_hash)
             
             return {
                 "source_id": source_id,
@@ -298,19 +535,54 @@ class IngestionPipeline:
             # await self._log_failed_job(error_info)
             raise RuntimeError(f"Ingestion failed: {str(e)}") from e
     
-    def _compute_text_hash(self, text: str, source_id: str) -> str:
+    async def ingest_texts(
+        self,
+        items: List[Dict[str, Any]],
+        check_hash: bool = True,
+        extract_graph: bool = True,
+    ) -> List[Dict[str, Any]]:
         """
-        Compute hash for text content for idempotency checking.
+        Ingest several texts, a few documents at a time.
+        
+        Documents share this pipeline's parsers, extractor and the pooled
+        Neo4j/Qdrant clients; each is still written under its own source_id
+        so entities keep their per-document provenance.
         
         Args:
-            text: Text content
-            source_id: Source identifier
+            items: Dicts with "text" and "source_id", plus optional
+                "source_name" and "clearance_level" (same meaning as in ingest_text)
+            check_hash: Whether to check file hash for idempotency (default: True)
+            extract_graph: Whether to run entity/relation extraction
             
         Returns:
-            SHA256 hash string
+            One result per item, in input order. Failed items get
+            status "failed" and an "error" message instead of raising.
         """
-        content = f"{source_id}:{text}"
-        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+        semaphore = asyncio.Semaphore(max(1, settings.INGEST_BATCH_CONCURRENCY))
+        
+        async def _ingest_one(item: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    return await self.ingest_text(
+                        text=item["text"],
+                        source_id=item["source_id"],
+                        source_name=item.get("source_name"),
+                        clearance_level=item.get("clearance_level", "L3"),
+                        check_hash=check_hash,
+                        extract_graph=extract_graph,
+                    )
+                except Exception as e:
+                    return {
+                        "source_id": item.get("source_id"),
+                        "source_name": item.get("source_name"),
+                        "entities_extracted": 0,
+                        "relations_extracted": 0,
+                        "chunks_created": 0,
+                        "status": "failed",
+                        "error": str(e),
+                    }
+        
+        return list(await asyncio.gather(*(_ingest_one(item) for item in items)))
     
     async def _store_in_neo4j(
         self,
@@ -325,6 +597,9 @@ class IngestionPipeline:
             nodes: List of extracted nodes (JSON format)
             edges: List of extracted edges (JSON format)
             document_id: Document ID for linking
+            
+        Raises:
+            Exception: If the document's graph transaction fails (nothing is written)
         """
         if not nodes and not edges:
             logger.warning(f"[INGEST] No nodes or edges to store in Neo4j for document_id={document_id}")
@@ -335,85 +610,72 @@ class IngestionPipeline:
         # Fixed: Add logging for Neo4j storage
         logger.info(f"[INGEST] Storing {len(nodes)} nodes and {len(edges)} edges in Neo4j for document_id={document_id}")
         
-        async with driver.session() as session:
-            # Create nodes
-            nodes_created = 0
-            for node in nodes:
-                entity_type = node.get("type", "entity").upper()
-                entity_id = node.get("id", "")
-                
-                # Fixed: Generate entity ID if missing
-                if not entity_id:
-                    entity_name = node.get("label") or node.get("properties", {}).get("name", "unknown")
-                    entity_id = f"{entity_type.lower()}_{entity_name.lower().replace(' ', '_')}"
-                    logger.warning(f"[INGEST] Generated entity ID: {entity_id} for entity without ID")
-                
-                properties = node.get("properties", {}).copy()
-                properties["source_id"] = document_id
-                properties["name"] = node.get("label") or properties.get("name", entity_id)
-                
-                # Fixed: Ensure entity_id is in properties for consistency
-                if "id" not in properties:
-                    properties["id"] = entity_id
-                
-                # Create or update node
-                # Use parameterized query to prevent injection
-                query = f"""
-                MERGE (n:{entity_type} {{id: $entity_id}})
-                SET n += $properties
-                RETURN n
-                """
-                try:
-                    result = await session.run(query, entity_id=entity_id, properties=properties)
-                    await result.consume()  # Consume result to ensure query executes
-                    nodes_created += 1
-                except Exception as e:
-                    logger.error(f"[INGEST] Failed to store node {entity_id}: {e}")
-                    continue
+        # Group nodes by label so each label is written with one UNWIND per batch
+        node_rows_by_label: Dict[str, List[Dict[str, Any]]] = {}
+        label_by_id: Dict[str, str] = {}
+        for node in nodes:
+            entity_type = _cypher_identifier(node.get("type", "entity").upper(), "ENTITY")
+            entity_id = node.get("id", "")
             
-            logger.info(f"[INGEST] Created/updated {nodes_created}/{len(nodes)} nodes in Neo4j")
+            # Fixed: Generate entity ID if missing
+            if not entity_id:
+                entity_name = node.get("label") or node.get("properties", {}).get("name", "unknown")
+                entity_id = f"{entity_type.lower()}_{entity_name.lower().replace(' ', '_')}"
+                logger.warning("[INGEST] Generated entity ID: %s for entity without ID", entity_id)
             
-            # Create relationships
-            edges_created = 0
-            for edge in edges:
-                source_id = edge.get("source", "")
-                target_id = edge.get("target", "")
-                rel_type = edge.get("relationship", "related_to").upper()
-                properties = edge.get("properties", {}).copy()
-                weight = edge.get("weight", 1.0)
-                properties["weight"] = weight
-                
-                # Fixed: Skip edges with missing source or target
-                if not source_id or not target_id:
-                    logger.warning(f"[INGEST] Skipping edge with missing source or target: source={source_id}, target={target_id}")
-                    continue
-                
-                # Create relationship
-                query = f"""
-                MATCH (a), (b)
-                WHERE a.id = $source_id AND b.id = $target_id
-                MERGE (a)-[r:{rel_type}]->(b)
-                SET r += $properties
-                RETURN r
-                """
-                try:
-                    result = await session.run(
-                        query,
-                        source_id=source_id,
-                        target_id=target_id,
-                        properties=properties,
-                    )
-                    await result.consume()  # Consume result to ensure query executes
-                    edges_created += 1
-                except Exception as e:
-                    logger.error(f"[INGEST] Failed to store edge {source_id}->{target_id}: {e}")
-                    continue
+            properties = _neo4j_properties(node.get("properties", {}))
+            properties["source_id"] = document_id
+            properties["name"] = node.get("label") or properties.get("name", entity_id)
+            
+            # Fixed: Ensure entity_id is in properties for consistency
+            if "id" not in properties:
+                properties["id"] = entity_id
+            
+            node_rows_by_label.setdefault(entity_type, []).append({"id": entity_id, "props": properties})
+            label_by_id[entity_id] = entity_type
+        
+        # Group edges by (source label, target label, relationship type) so endpoints are
+        # matched by label and id (an index seek) instead of an unlabeled scan.
+        # Endpoints not extracted in this batch have no known label (None).
+        edge_rows_by_key: Dict[Tuple[Optional[str], Optional[str], str], List[Dict[str, Any]]] = {}
+        for edge in edges:
+            edge_source = edge.get("source", "")
+            edge_target = edge.get("target", "")
+            
+            # Fixed: Skip edges with missing source or target
+            if not edge_source or not edge_target:
+                logger.warning("[INGEST] Skipping edge with missing source or target: source=%s, target=%s", edge_source, edge_target)
+                continue
+            
+            properties = _neo4j_properties(edge.get("properties", {}))
+            properties["weight"] = _neo4j_property_value(edge.get("weight", 1.0))
+            
+            rel_type = _cypher_identifier(edge.get("relationship", "related_to").upper(), "RELATED_TO")
+            edge_key = (label_by_id.get(edge_source), label_by_id.get(edge_target), rel_type)
+            edge_rows_by_key.setdefault(edge_key, []).append(
+                {"src": edge_source, "tgt": edge_target, "props": properties}
+            )
+        
+        async with driver.session() as session:
+            await _ensure_label_indexes(session, node_rows_by_label)
             
+            try:
+                # One transaction per document: a single commit instead of one per batch
+                nodes_created, edges_created = await session.execute_write(
+                    _upload_tx, node_rows_by_label, edge_rows_by_key
+                )
+            except Exception as e:
+                # Fail the ingest so the document is not marked as processed and can be retried
+                logger.error("[INGEST] Failed to store graph for document_id=%s: %s", document_id, e)
+                raise
+            
+            logger.info(f"[INGEST] Created/updated {nodes_created}/{len(nodes)} nodes in Neo4j")
             logger.info(f"[INGEST] Created/updated {edges_created}/{len(edges)} edges in Neo4j")
     
     async def _store_in_qdrant(
         self,
         nodes: List[Any],
+        texts: List[str],
         document_id: str,
         clearance_level: str,
     ) -> None:
@@ -422,6 +684,7 @@ class IngestionPipeline:
         
         Args:
             nodes: Document nodes (chunks)
+            texts: Content of each node, in the same order
             document_id: Document ID
             clearance_level: Clearance level
         """
@@ -442,34 +705,52 @@ class IngestionPipeline:
         from app.core.embeddings import get_embedding_service
         
         embedding_service = get_embedding_service()
-        texts = [node.get_content() for node in nodes]
-        embeddings = await embedding_service.get_embeddings(texts)
         
-        points = []
-        for i, (node, embedding) in enumerate(zip(nodes, embeddings)):
-            node_id = f"{document_id}_{i}"
-            text = node.get_content()
-            
-            points.append({
-                "id": node_id,
-                "vector": embedding,
-                "payload": {
-                    "text": text,
-                    "document_id": document_id,
-                    "clearance_level": clearance_level,
-                    "metadata": node.metadata if hasattr(node, "metadata") else {},
-                },
-            })
+        # Embed and upsert in small batches, a few in flight at once, so one huge
+        # embedding call / upsert payload doesn't dominate memory and latency
+        batch_size = max(1, settings.QDRANT_UPSERT_BATCH_SIZE)
+        semaphore = asyncio.Semaphore(max(1, settings.QDRANT_UPSERT_CONCURRENCY))
         
-        if points:
-            try:
-                await client.upsert(
-                    collection_name=settings.QDRANT_COLLECTION_NAME,
-                    points=points,
-                )
-            except Exception as e:
-                logger.warning(f"Failed to store in Qdrant: {e}")
-                # Continue even if Qdrant fails
+        async def _store_batch(start: int) -> None:
+            async with semaphore:
+                batch_nodes = nodes[start:start + batch_size]
+                embeddings = await embedding_service.get_embeddings(texts[start:start + batch_size])
+                
+                # Point ids are UUID5s of (document, chunk index): Qdrant stores UUIDs
+                # natively and re-ingesting the same document overwrites its points
+                ids = [
+                    str(uuid.uuid5(uuid.NAMESPACE_URL, f"{document_id}:{i}"))
+                    for i in range(start, start + len(batch_nodes))
+                ]
+                payloads = [
+                    {
+                        "text": text,
+                        "document_id": document_id,
+                        "clearance_level": clearance_level,
+                        "metadata": node.metadata if hasattr(node, "metadata") else {},
+                    }
+                    for node, text in zip(batch_nodes, texts[start:start + batch_size])
+                ]
+                
+                try:
+                    # wait=False: Qdrant acknowledges on receipt, so the next batch's embedding overlaps indexing
+                    await client.upsert(
+                        collection_name=settings.QDRANT_COLLECTION_NAME,
+                        points=models.Batch(ids=ids, vectors=embeddings.tolist(), payloads=payloads),
+                        wait=False,
+                    )
+                except Exception as e:
+                    logger.warning(f"Failed to store in Qdrant: {e}")
+                    # Continue even if Qdrant fails
+        
+        # A failed batch cancels its siblings, so no points are written for an ingest
+        # that has already been reported as failed
+        try:
+            async with asyncio.TaskGroup() as tg:
+                for start in range(0, len(nodes), batch_size):
+                    tg.create_task(_store_batch(start))
+        except ExceptionGroup as eg:
+            raise eg.exceptions[0]
     
     async def _log_failed_job(self, error_info: Dict[str, Any]) -> None:
         """
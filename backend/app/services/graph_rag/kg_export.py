@@ -7,6 +7,7 @@ import logging
 from typing import Any, Dict, List, Optional
 
 from app.core.database import get_neo4j_driver
+from app.services.graph_rag.ontology import ENTITY_LABEL
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +18,25 @@ class KGExporter:
     Formats graph data according to portal visualization schema.
     """
     
+    # Shared tail of the export queries: the selected nodes `n` with their outgoing relationships
+    # to other selected nodes, projected to just the fields the portal schema needs. Membership is
+    # tested on a list of integer ids, which the runtime can check as a hashed set. The label is the
+    # node's per-type label, skipping the shared ENTITY_LABEL every extracted node carries
+    _EDGES_RETURN = f"""
+        WITH collect(n) AS selected, collect(id(n)) AS selected_ids
+        UNWIND selected AS n
+        OPTIONAL MATCH (n)-[r]->(m)
+        WHERE id(m) IN selected_ids
+        RETURN coalesce(toString(n.id), toString(n.name), toString(id(n))) AS id,
+               head([l IN labels(n) WHERE l <> '{ENTITY_LABEL}'] + labels(n)) AS label,
+               properties(n) AS props,
+               collect(CASE WHEN r IS NULL THEN NULL ELSE {{
+                   type: type(r),
+                   target: coalesce(toString(m.id), toString(m.name), toString(id(m))),
+                   props: properties(r)
+               }} END) AS rels
+        """
+    
     async def export_graph(
         self,
         document_id: Optional[str] = None,
@@ -40,103 +60,41 @@ class KGExporter:
             logger.warning(f"Neo4j not available: {e}")
             return {"nodes": [], "edges": []}
         
-        nodes = []
-        edges = []
-        node_ids = set()
-        edge_ids = set()
+        nodes: List[Dict[str, Any]] = []
+        edges: List[Dict[str, Any]] = []
+        
+        # Pick the node set first, then fetch each node's outgoing relationships in the
+        # same query; Neo4j dedups nodes and returns plain values instead of graph objects
+        if include_isolated_nodes and not document_id:
+            node_filter = ""
+        else:
+            node_filter = "WHERE EXISTS { MATCH (n)--() }"
+        
+        query = f"""
+        MATCH (n)
+        {node_filter}
+        WITH n LIMIT $limit
+        {self._EDGES_RETURN}
+        """
         
         try:
             async with driver.session() as session:
-                # Build query based on filters
                 if document_id:
-                    # Query for specific document
-                    query = """
-                    MATCH (n)-[r]-(connected)
-                    WHERE n.source_id = $document_id OR connected.source_id = $document_id
-                    RETURN n, r, connected
-                    LIMIT $record_limit
-                    """
-                    result = await session.run(query, document_id=document_id, record_limit=limit * 2)
-                elif include_isolated_nodes:
-                    # Query all nodes and relationships
-                    query = """
-                    MATCH (n)
-                    OPTIONAL MATCH (n)-[r]-(connected)
-                    RETURN n, r, connected
-                    LIMIT $record_limit
-                    """
-                    result = await session.run(query, record_limit=limit * 2)
-                else:
-                    # Query only connected nodes
-                    query = """
-                    MATCH (n)-[r]-(connected)
-                    RETURN n, r, connected
-                    LIMIT $record_limit
-                    """
-                    result = await session.run(query, record_limit=limit * 2)
-                
-                async for record in result:
-                    # Extract nodes
-                    for node_key in ["n", "connected"]:
-                        if node_key in record:
-                            node = record[node_key]
-                            if node is None:
-                                continue
-                            
-                            node_id = self._get_node_id(node)
-                            if node_id and node_id not in node_ids:
-                                formatted_node = self._format_node(node)
-                                if formatted_node:
-                                    nodes.append(formatted_node)
-                                    node_ids.add(node_id)
-                                    
-                                    if len(nodes) >= limit:
-                                        break
-                    
-                    # Extract relationships
-                    if len(nodes) < limit and "r" in record:
-                        rel = record["r"]
-                        if rel is None:
-                            continue
-                        
-                        source_id = self._get_node_id(rel.start_node)
-                        target_id = self._get_node_id(rel.end_node)
-                        
-                        if source_id and target_id and source_id in node_ids and target_id in node_ids:
-                            edge_key = f"{source_id}-{rel.type}-{target_id}"
-                            if edge_key not in edge_ids:
-                                formatted_edge = self._format_edge(rel, source_id, target_id)
-                                if formatted_edge:
-                                    edges.append(formatted_edge)
-                                    edge_ids.add(edge_key)
-                    
-                    if len(nodes) >= limit:
-                        break
-                
-                # If include_isolated_nodes, also get nodes without relationships
-                if include_isolated_nodes and len(nodes) < limit:
-                    isolated_query = """
-                    MATCH (n)
-                    WHERE NOT (n)--()
-                    RETURN n
-                    LIMIT $isolated_limit
-                    """
-                    isolated_result = await session.run(
-                        isolated_query, isolated_limit=limit - len(nodes)
+                    query = self._document_query(include_isolated_nodes)
+                result = await session.run(query, document_id=document_id, limit=limit)
+                records = [(record["id"], record["label"], record["props"], record["rels"]) async for record in result]
+            
+            nodes = [self._format_node(node_id, label, props) for node_id, label, props, _ in records]
+            
+            # Relationships already end at exported nodes; keep one edge per (source, type, target)
+            edges_by_key: Dict[tuple, Dict[str, Any]] = {}
+            for node_id, _, _, rels in records:
+                for rel in rels:
+                    edges_by_key.setdefault(
+                        (node_id, rel["type"], rel["target"]),
+                        self._format_edge(rel["type"], rel["props"], node_id, rel["target"]),
                     )
-                    
-                    async for record in isolated_result:
-                        if "n" in record:
-                            node = record["n"]
-                            node_id = self._get_node_id(node)
-                            if node_id and node_id not in node_ids:
-                                formatted_node = self._format_node(node)
-                                if formatted_node:
-                                    nodes.append(formatted_node)
-                                    node_ids.add(node_id)
-                                    
-                                    if len(nodes) >= limit:
-                                        break
+            edges = list(edges_by_key.values())
         
         except Exception as e:
             logger.error(f"Error exporting graph: {e}", exc_info=True)
@@ -148,102 +106,88 @@ class KGExporter:
             "edges": edges,
         }
     
-    def _get_node_id(self, node: Any) -> Optional[str]:
+    def _document_query(self, include_isolated_nodes: bool) -> str:
         """
-        Get unique node ID from Neo4j node.
+        Build the export query for one document's subgraph.
+        
+        Exports nodes from the document plus their direct neighbours. The
+        seed nodes are found through the source_id index on the shared
+        ENTITY_LABEL, so the query text is fixed and its plan is cached,
+        however many entity types have been ingested.
         
         Args:
-            node: Neo4j node object
+            include_isolated_nodes: Whether to include document nodes without relationships
             
         Returns:
-            Node ID string or None
+            Cypher query
+        """
+        seed_filter = "" if include_isolated_nodes else "WHERE EXISTS { (d)--() }"
+        return f"""
+        MATCH (d:{ENTITY_LABEL} {{source_id: $document_id}})
+        {seed_filter}
+        CALL {{
+            WITH d RETURN d AS n
+            UNION
+            WITH d MATCH (d)--(n) RETURN n
+        }}
+        WITH DISTINCT n LIMIT $limit
+        {self._EDGES_RETURN}
         """
-        if node is None:
-            return None
-        
-        # Try to get ID from properties
-        node_dict = dict(node)
-        if "id" in node_dict:
-            return str(node_dict["id"])
-        elif "name" in node_dict:
-            return str(node_dict["name"])
-        else:
-            # Fallback to Neo4j internal ID
-            return str(node.id)
     
-    def _format_node(self, node: Any) -> Optional[Dict[str, Any]]:
+    def _format_node(
+        self, node_id: str, node_label: Optional[str], properties: Dict[str, Any]
+    ) -> Dict[str, Any]:
         """
-        Format Neo4j node as JSON-compliant node.
+        Format an exported Neo4j node as JSON-compliant node.
         
         Args:
-            node: Neo4j node object
+            node_id: Node ID (id property, name, or internal ID)
+            node_label: Per-type Neo4j label of the node, if any
+            properties: Node properties
             
         Returns:
-            Formatted node dictionary or None
+            Formatted node dictionary
         """
-        if node is None:
-            return None
-        
-        node_dict = dict(node)
-        node_id = self._get_node_id(node)
-        
-        if not node_id:
-            return None
-        
         # Get label (entity type)
-        labels = list(node.labels) if hasattr(node, "labels") else []
-        entity_type = labels[0].lower() if labels else "entity"
+        entity_type = node_label.lower() if node_label else "entity"
         
         # Get display label (name or id)
-        label = node_dict.get("name", node_dict.get("id", node_id))
-        
-        # Format properties
-        properties = {k: v for k, v in node_dict.items() if k not in ["id", "name"]}
+        label = properties.get("name", properties.get("id", node_id))
         
         return {
             "id": node_id,
             "label": str(label),
             "type": entity_type,
-            "properties": properties,
+            "properties": {k: v for k, v in properties.items() if k not in ("id", "name")},
         }
     
     def _format_edge(
-        self, rel: Any, source_id: str, target_id: str
-    ) -> Optional[Dict[str, Any]]:
+        self, rel_type: str, properties: Dict[str, Any], source_id: str, target_id: str
+    ) -> Dict[str, Any]:
         """
-        Format Neo4j relationship as JSON-compliant edge.
+        Format an exported Neo4j relationship as JSON-compliant edge.
         
         Args:
-            rel: Neo4j relationship object
+            rel_type: Relationship type
+            properties: Relationship properties
             source_id: Source node ID
             target_id: Target node ID
             
         Returns:
-            Formatted edge dictionary or None
+            Formatted edge dictionary
         """
-        if rel is None:
-            return None
-        
-        # Get relationship type
-        rel_type = rel.type.lower() if hasattr(rel, "type") else "related_to"
-        
-        # Get relationship properties
-        rel_dict = dict(rel) if hasattr(rel, "__iter__") else {}
-        
         # Calculate weight (default 1.0)
-        weight = rel_dict.get("weight", 1.0)
+        weight = properties.get("weight", 1.0)
         if not isinstance(weight, (int, float)):
             weight = 1.0
         
-        # Extract properties (excluding weight)
-        properties = {k: v for k, v in rel_dict.items() if k != "weight"}
-        
         return {
             "source": source_id,
             "target": target_id,
-            "relationship": rel_type,
+            "relationship": rel_type.lower() if rel_type else "related_to",
             "weight": float(weight),
-            "properties": properties,
+            # Extract properties (excluding weight)
+            "properties": {k: v for k, v in properties.items() if k != "weight"},
         }
 
 
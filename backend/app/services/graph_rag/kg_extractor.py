@@ -10,6 +10,7 @@ Implements high-fidelity, production-grade KG extraction with:
 
 import json
 import re
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Set, Tuple
 from collections import defaultdict
 
@@ -18,6 +19,28 @@ from llama_index.core.llms import LLM
 from app.core.config import settings
 from app.services.graph_rag.ontology import ENTITY_TYPES, RELATION_TYPES
 
+# Precompiled patterns for entity name normalization and ID/type slugs
+_WS_RE = re.compile(r'\s+')
+_ART_RE = re.compile(r'^(the|a|an)\s+')
+_SLUG_RE = re.compile(r'[^a-z0-9]+')
+_TYPE_SLUG_RE = re.compile(r'[^a-z0-9_]+')
+
+
+@lru_cache(maxsize=8192)
+def _normalize_entity_name(name: str) -> str:
+    """Normalize an entity name (memoized; names repeat across entities and relations)."""
+    if not name:
+        return ""
+    
+    # Convert to lowercase and strip
+    normalized = name.lower().strip()
+    
+    # Remove extra whitespace
+    normalized = _WS_RE.sub(' ', normalized)
+    
+    # Remove common prefixes/suffixes
+    return _ART_RE.sub('', normalized)
+
 
 class EntityResolver:
     """
@@ -29,6 +52,8 @@ class EntityResolver:
         """Initialize entity resolver with canonicalization rules."""
         self.canonical_map: Dict[str, str] = {}
         self.entity_variants: Dict[str, Set[str]] = defaultdict(set)
+        # Inverse of entity_variants (variant -> canonical) for O(1) variant lookup
+        self.variant_to_canonical: Dict[str, str] = {}
         
     def normalize_entity_name(self, name: str) -> str:
         """
@@ -40,19 +65,7 @@ class EntityResolver:
         Returns:
             Normalized entity name
         """
-        if not name:
-            return ""
-        
-        # Convert to lowercase and strip
-        normalized = name.lower().strip()
-        
-        # Remove extra whitespace
-        normalized = re.sub(r'\s+', ' ', normalized)
-        
-        # Remove common prefixes/suffixes
-        normalized = re.sub(r'^(the|a|an)\s+', '', normalized)
-        
-        return normalized
+        return _normalize_entity_name(name)
     
     def find_canonical(self, entity_name: str, entity_type: str) -> str:
         """
@@ -65,22 +78,34 @@ class EntityResolver:
         Returns:
             Canonical entity name
         """
-        normalized = self.normalize_entity_name(entity_name)
+        return self._canonical_for(self.normalize_entity_name(entity_name), entity_name)
+    
+    def _canonical_for(self, normalized: str, entity_name: str) -> str:
+        """
+        Find or create the canonical name for an already-normalized entity name.
         
+        Args:
+            normalized: Normalized form of entity_name
+            entity_name: Original entity name (becomes canonical if new)
+            
+        Returns:
+            Canonical entity name
+        """
         # Check if we already have a canonical form
         if normalized in self.canonical_map:
             return self.canonical_map[normalized]
         
         # Check for similar variants
-        for canonical, variants in self.entity_variants.items():
-            if normalized in variants:
-                self.canonical_map[normalized] = canonical
-                return canonical
+        canonical = self.variant_to_canonical.get(normalized)
+        if canonical is not None:
+            self.canonical_map[normalized] = canonical
+            return canonical
         
         # Create new canonical form (use original name as canonical)
         canonical = entity_name.strip()
         self.canonical_map[normalized] = canonical
         self.entity_variants[canonical].add(normalized)
+        self.variant_to_canonical[normalized] = canonical
         
         return canonical
     
@@ -88,14 +113,21 @@ class EntityResolver:
         """
         Merge duplicate entities based on name similarity and type.
         
+        Entities are grouped, merged and canonicalized in a single pass;
+        each name is normalized once.
+        
         Args:
             entities: List of entity dictionaries
             
         Returns:
             Merged list of unique entities
         """
-        # Group entities by type and normalized name
-        entity_groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
+        # Group entities by type and normalized name; the value is the (merged) entity
+        grouped: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Groups with duplicates, with the name of their first entity
+        duplicated: Dict[Tuple[str, str], str] = {}
+        # Multi-valued properties of merged groups
+        set_props: Dict[Tuple[str, str], Dict[str, Set[Any]]] = {}
         
         for entity in entities:
             entity_type = entity.get("type", "ENTITY").upper()
@@ -104,65 +136,70 @@ class EntityResolver:
             if not entity_name:
                 continue
             
-            normalized_name = self.normalize_entity_name(entity_name)
-            key = (entity_type, normalized_name)
-            entity_groups[key].append(entity)
-        
-        # Merge entities in each group
-        merged_entities = []
-        for (entity_type, normalized_name), group in entity_groups.items():
-            if len(group) == 1:
-                # No duplicates, use as-is
-                merged_entities.append(group[0])
-            else:
-                # Merge multiple entities
-                merged_entity = self._merge_entity_group(group)
-                merged_entities.append(merged_entity)
-        
-        return merged_entities
-    
-    def _merge_entity_group(self, entities: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """
-        Merge a group of duplicate entities into one.
-        
-        Args:
-            entities: List of duplicate entities to merge
+            key = (entity_type, self.normalize_entity_name(entity_name))
+            merged = grouped.get(key)
+            if merged is None:
+                # No duplicates (yet), use as-is
+                grouped[key] = entity
+                continue
             
-        Returns:
-            Merged entity dictionary
-        """
-        if not entities:
-            return {}
-        
-        # Use first entity as base
-        merged = entities[0].copy()
-        merged_properties = merged.get("properties", {}).copy()
-        
-        # Merge properties from all entities
-        for entity in entities[1:]:
-            props = entity.get("properties", {})
-            for key, value in props.items():
-                if key not in merged_properties:
-                    merged_properties[key] = value
-                elif isinstance(merged_properties[key], list) and isinstance(value, list):
-                    # Merge lists
-                    merged_properties[key] = list(set(merged_properties[key] + value))
-                elif merged_properties[key] != value:
-                    # Keep both values as list
-                    if not isinstance(merged_properties[key], list):
-                        merged_properties[key] = [merged_properties[key]]
-                    if value not in merged_properties[key]:
-                        merged_properties[key].append(value)
-        
-        merged["properties"] = merged_properties
-        
-        # Use canonical name
-        entity_name = merged_properties.get("name", merged.get("id", ""))
-        canonical_name = self.find_canonical(entity_name, merged.get("type", "ENTITY"))
-        merged_properties["name"] = canonical_name
-        merged["id"] = self._generate_entity_id(canonical_name, merged.get("type", "ENTITY"))
-        
-        return merged
+            if key not in duplicated:
+                # Second sighting: copy the first entity before merging into it
+                duplicated[key] = merged.get("properties", {}).get("name", merged.get("id", ""))
+                merged = merged.copy()
+                merged["properties"] = merged.get("properties", {}).copy()
+                grouped[key] = merged
+            
+            # Merge properties into the first entity's; multi-valued properties
+            # accumulate in sets and become lists once the pass is done
+            merged_properties = merged["properties"]
+            props_sets = set_props.setdefault(key, {})
+            for prop_key, value in entity.get("properties", {}).items():
+                values = props_sets.get(prop_key)
+                if values is not None:
+                    try:
+                        if isinstance(value, list):
+                            values.update(value)
+                        else:
+                            values.add(value)
+                        continue
+                    except TypeError:
+                        # Unhashable value: merge this property as a plain list from here on
+                        merged_properties[prop_key] = list(props_sets.pop(prop_key))
+                
+                if prop_key not in merged_properties:
+                    merged_properties[prop_key] = value
+                    continue
+                
+                current = merged_properties[prop_key]
+                if not isinstance(current, list) and current == value:
+                    continue
+                
+                try:
+                    # Keep both values (or the union of both lists)
+                    values = set(current) if isinstance(current, list) else {current}
+                    if isinstance(value, list):
+                        values.update(value)
+                    else:
+                        values.add(value)
+                    props_sets[prop_key] = values
+                except TypeError:
+                    if not isinstance(current, list):
+                        current = merged_properties[prop_key] = [current]
+                    for item in (value if isinstance(value, list) else [value]):
+                        if item not in current:
+                            current.append(item)
+        
+        # Use canonical name and ID for merged entities
+        for key, entity_name in duplicated.items():
+            merged = grouped[key]
+            for prop_key, values in set_props.get(key, {}).items():
+                merged["properties"][prop_key] = list(values)
+            normalized_name = key[1]
+            merged["properties"]["name"] = self._canonical_for(normalized_name, str(entity_name))
+            merged["id"] = f"{merged.get('type', 'ENTITY').lower()}_{self._slug(normalized_name)}"
+        
+        return list(grouped.values())
     
     def _generate_entity_id(self, name: str, entity_type: str) -> str:
         """
@@ -176,9 +213,12 @@ class EntityResolver:
             Unique entity ID
         """
         # Create ID from type and normalized name
-        normalized = self.normalize_entity_name(name)
-        normalized = re.sub(r'[^a-z0-9]+', '_', normalized)
-        return f"{entity_type.lower()}_{normalized}"
+        return f"{entity_type.lower()}_{self._slug(self.normalize_entity_name(name))}"
+    
+    @staticmethod
+    def _slug(normalized: str) -> str:
+        """Turn a normalized entity name into an ID slug."""
+        return _SLUG_RE.sub('_', normalized)
 
 
 class EnhancedKGExtractor:
@@ -484,7 +524,7 @@ TEXT TO EXTRACT FROM:
             label = properties.get("name", entity_id)
             
             # Ensure type is lowercase snake_case
-            entity_type = re.sub(r'[^a-z0-9_]+', '_', entity_type.lower())
+            entity_type = _TYPE_SLUG_RE.sub('_', entity_type.lower())
             
             nodes.append({
                 "id": entity_id,
@@ -513,7 +553,7 @@ TEXT TO EXTRACT FROM:
             properties = relation.get("properties", {})
             
             # Ensure relationship type is lowercase snake_case
-            rel_type = re.sub(r'[^a-z0-9_]+', '_', rel_type.lower())
+            rel_type = _TYPE_SLUG_RE.sub('_', rel_type.lower())
             
             # Calculate weight (default 1.0, can be based on evidence confidence)
             weight = properties.get("weight", 1.0)
@@ -3,6 +3,12 @@ GraphRAG Ontology Definition
 Strict entity and relation types for knowledge graph extraction.
 """
 
+from functools import lru_cache
+
+# Shared Neo4j label on every extracted node, next to its per-type label (e.g. :Entity:PERSON);
+# mixed case so it can't collide with the upper-cased type labels
+ENTITY_LABEL = "Entity"
+
 # Entity Types
 ENTITY_TYPES = {
     "PERSON": {
@@ -57,6 +63,7 @@ RELATION_TYPES = {
 }
 
 
+@lru_cache(maxsize=1)
 def get_extraction_prompt() -> str:
     """
     Get the LLM prompt for graph extraction with strict ontology enforcement.
@@ -7,14 +7,15 @@ Implements hybrid retrieval with configurable weights per Cursor Rule guidelines
 - graph_weight: Weight for graph traversal (default: 0.5)
 """
 
+import asyncio
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 # Fixed: Corrected import path for LLM (changed from .types to direct import)
 from llama_index.core.llms import LLM
 
 from app.core.config import settings
-from app.core.database import get_neo4j_driver, get_qdrant_client
+from app.core.database import get_neo4j_driver, get_qdrant_client, get_qdrant_search_params
 from app.services.graph_rag.llm_setup import get_synthesis_llm
 from app.services.graph_rag.ontology import get_synthesis_prompt
 
@@ -74,17 +75,15 @@ class HybridSearchService:
         Returns:
             Dictionary with search results, graph path, and synthesized answer
         """
-        # Step 1: Vector search in Qdrant (semantic similarity)
-        vector_results = await self._vector_search(query, top_k, user_clearance)
-        
-        # Step 2: Extract entities from query using LLM (enhanced extraction)
-        entities = await self._extract_entities_from_query_llm(query)
+        # Steps 1-3: Vector search in Qdrant (semantic similarity) runs concurrently
+        # with query entity extraction + graph traversal in Neo4j (structural reasoning)
+        vector_results, (entities, graph_path) = await asyncio.gather(
+            self._vector_search(query, top_k, user_clearance),
+            self._graph_search(query, user_clearance),
+        )
         # Also extract from vector results
         entities.extend(self._extract_entities_from_results(vector_results))
         
-        # Step 3: Graph traversal in Neo4j (structural reasoning)
-        graph_path = await self._graph_traversal(entities, user_clearance)
-        
         # Step 4: Combine results with weights
         combined_context = self._combine_results(
             vector_results,
@@ -152,6 +151,7 @@ class HybridSearchService:
                 collection_name=settings.QDRANT_COLLECTION_NAME,
                 query_vector=query_embedding,
                 limit=top_k * 2,  # Get more results to filter
+                search_params=get_qdrant_search_params(),
             )
             
             # Filter by clearance level in Python
@@ -185,6 +185,28 @@ class HybridSearchService:
             logger.error(f"Error in vector search: {e}", exc_info=True)
             return []
     
+    async def _graph_search(
+        self,
+        query: str,
+        user_clearance: str,
+    ) -> Tuple[List[str], Dict[str, Any]]:
+        """
+        Extract entities from the query and traverse the graph between them.
+        
+        Independent of the vector search, so both can run concurrently.
+        Opens its own Neo4j session (sessions are not shared across tasks).
+        
+        Args:
+            query: User query
+            user_clearance: User clearance level
+            
+        Returns:
+            Tuple of (entities extracted from query, graph traversal path)
+        """
+        entities = await self._extract_entities_from_query_llm(query)
+        graph_path = await self._graph_traversal(entities, user_clearance)
+        return entities, graph_path
+    
     async def _extract_entities_from_query_llm(self, query: str) -> List[str]:
         """
         Extract entity names from query using LLM (enhanced extraction per Cursor Rule).
@@ -210,7 +232,6 @@ Return format: ["entity1", "entity2", ...]"""
             if hasattr(extraction_llm, "acomplete"):
                 response = await extraction_llm.acomplete(prompt)
             else:
-                import asyncio
                 response = await asyncio.to_thread(extraction_llm.complete, prompt)
             
             response_text = str(response).strip()
@@ -405,7 +426,6 @@ Return format: ["entity1", "entity2", ...]"""
             if hasattr(self.synthesis_llm, "acomplete"):
                 response = await self.synthesis_llm.acomplete(prompt)
             else:
-                import asyncio
                 response = await asyncio.to_thread(self.synthesis_llm.complete, prompt)
             return str(response).strip()
         except Exception as e:
@@ -12,6 +12,8 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 
+import numpy as np
+
 from app.core.config import settings
 from app.core.storage import ensure_minio_bucket, get_minio_client
 
@@ -20,6 +22,9 @@ logger = logging.getLogger(__name__)
 # Fixed: Metadata file path for persistence across restarts
 METADATA_FILE = Path("vault_storage") / "_metadata.json"
 
+# Clearance levels as integers (files with unknown levels are treated as L3)
+CLEARANCE_ORDER = {"L1": 1, "L2": 2, "L3": 3}
+
 
 class FileMetadata:
     """File metadata model."""
@@ -75,6 +80,29 @@ class VaultService:
         # Fixed: Load file metadata from disk for persistence across restarts
         self._files: Dict[str, FileMetadata] = {}
         self._load_metadata()
+        
+        # Sorted file snapshot with a parallel int8 clearance array, rebuilt lazily
+        self._sorted_files: Optional[List[FileMetadata]] = None
+        self._clearance_array: Optional[np.ndarray] = None
+    
+    def _invalidate_snapshot(self) -> None:
+        """Drop the cached sorted file list and clearance array."""
+        self._sorted_files = None
+        self._clearance_array = None
+    
+    def _ensure_snapshot(self) -> None:
+        """Build the sorted file list and its clearance array if stale."""
+        if self._sorted_files is not None:
+            return
+        
+        # Sort by upload date (newest first)
+        files = sorted(self._files.values(), key=lambda f: f.uploaded_at, reverse=True)
+        self._clearance_array = np.fromiter(
+            (CLEARANCE_ORDER.get(f.clearance_level, 3) for f in files),
+            dtype=np.int8,
+            count=len(files),
+        )
+        self._sorted_files = files
     
     def _check_minio_available(self) -> bool:
         """Check if MinIO is available."""
@@ -220,6 +248,7 @@ class VaultService:
         
         # Store metadata
         self._files[file_id] = metadata
+        self._invalidate_snapshot()
         
         # Fixed: Persist metadata to disk
         self._save_metadata()
@@ -300,15 +329,25 @@ class VaultService:
         Returns:
             List of FileMetadata objects
         """
-        files = list(self._files.values())
+        self._ensure_snapshot()
         
         if uploaded_by:
-            files = [f for f in files if f.uploaded_by == uploaded_by]
+            return [f for f in self._sorted_files if f.uploaded_by == uploaded_by]
         
-        # Sort by upload date (newest first)
-        files.sort(key=lambda f: f.uploaded_at, reverse=True)
+        return list(self._sorted_files)
+    
+    def list_clearance_array(self) -> np.ndarray:
+        """
+        Get clearance levels of all files as an int8 array.
         
-        return files
+        The array is parallel to the unfiltered list returned by list_files(),
+        so it can be used to build vectorized access masks.
+        
+        Returns:
+            NumPy int8 array of clearance levels (L1=1, L2=2, L3=3)
+        """
+        self._ensure_snapshot()
+        return self._clearance_array
     
     def delete_file(self, file_id: str) -> bool:
         """
@@ -356,6 +395,7 @@ class VaultService:
         
         # Remove from metadata store
         del self._files[file_id]
+        self._invalidate_snapshot()
         
         # Fixed: Persist metadata to disk
         self._save_metadata()